@@ -0,0 +1,99 @@
+"""
+執行所有效能測試
+
+    python -m benchmarks                         # 全部
+    python -m benchmarks --only dispatch parsing # 部分
+    python -m benchmarks --json after.json --compare before.json
+
+`--json` 輸出機器可讀的結果，`--compare` 會與先前的結果比較，
+每秒處理量越高越好，`_ms` 結尾的延遲與記憶體用量、GC 次數越低越好。
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Dict, Iterator, Tuple
+
+from . import (
+    bench_irc_dispatch,
+    bench_listeners,
+    bench_lobby_latency,
+    bench_memory,
+    bench_mp_matcher,
+    bench_parsing,
+)
+from .common import lobby_lines
+
+BENCHMARKS = {
+    "dispatch": lambda: bench_irc_dispatch.run(),
+    "mp_matcher": lambda: bench_mp_matcher.run(lobby_lines()),
+    "parsing": lambda: bench_parsing.run(),
+    "lobby_latency": lambda: bench_lobby_latency.run(),
+    "memory": lambda: bench_memory.run(),
+    "listeners": lambda: bench_listeners.run(),
+}
+
+
+def flatten(results: dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)):
+            yield prefix + key, value
+
+
+def compare(current: dict, baseline: dict) -> None:
+    old: Dict[str, float] = dict(flatten(baseline))
+    for key, value in flatten(current):
+        if key.endswith("_per_second"):
+            better = 1
+        elif key.endswith(("_ms", "_bytes", "_blocks", "_collections")):
+            better = -1
+        else:
+            continue
+        if not (before := old.get(key)):
+            continue
+        change = (value - before) / before * 100
+        mark = "+" if change * better > 5 else "-" if change * better < -5 else " "
+        print(f"{mark} {key:<45} {before:>14,.2f} -> {value:>14,.2f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="osuirc 效能測試")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="只執行這些")
+    parser.add_argument("--json", help="把結果寫入 JSON 檔")
+    parser.add_argument("--compare", help="與先前的 JSON 結果比較")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        started = time.perf_counter()
+        results[name] = BENCHMARKS[name]()
+        print(f"{name} ({time.perf_counter() - started:.1f}s)")
+        for key, value in flatten(results[name]):
+            print(f"  {key:<40} {value:>14,.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "time": time.time(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\ncompare with {args.compare}")
+        compare(results, baseline["results"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+IrcHandler 分派速度：錄下來的比賽流量與大量的假流量
+
+    python -m benchmarks.bench_irc_dispatch [行數]
+"""
+
+import asyncio
+import sys
+import time
+
+from .common import offline_client, recorded_lines, synthetic_lines
+
+
+async def dispatch(lines, batch: int = 64) -> float:
+    """把訊息分批交給 client.feed，回傳處理完所有訊息的秒數"""
+    client = offline_client()
+    started = time.perf_counter()
+    for i in range(0, len(lines), batch):
+        await client.feed(lines[i : i + batch])
+    await client.scheduler.join()
+    return time.perf_counter() - started
+
+
+def run(count: int = 50000, rounds: int = 3) -> dict:
+    results = {}
+    for name, lines in (
+        ("recorded", recorded_lines()),
+        ("synthetic", synthetic_lines(count)),
+    ):
+        best = min(asyncio.run(dispatch(lines)) for _ in range(rounds))
+        results[name] = {
+            "lines": len(lines),
+            "lines_per_second": len(lines) / best,
+        }
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for name, r in run(count).items():
+        print(
+            f"{name:<10} {r['lines']:>8} lines {r['lines_per_second']:>12,.0f} lines/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+每個房間各自訂閱時的事件分派：一個事件只叫醒自己房間的回呼
+
+    python -m benchmarks.bench_listeners
+"""
+
+import asyncio
+import time
+
+from osuirc.utils.events import BaseMatchEvent, MatchStarted, PlayerJoined
+
+from .common import offline_client
+
+
+async def dispatch(lobbies: int, events: int) -> dict:
+    client = offline_client()
+    channels = [client.get_channel(f"#mp_{i}") for i in range(lobbies)]
+    called = 0
+
+    async def on_event(event):
+        nonlocal called
+        called += 1
+
+    for channel in channels:
+        client.mp_listen(PlayerJoined, channel=channel)(on_event)
+        client.mp_listen(MatchStarted, channel=channel)(on_event)
+    client.mp_listen(BaseMatchEvent, check=lambda e: False)(on_event)
+
+    mphandler = client.mphandler
+    started = time.perf_counter()
+    for i in range(events):
+        channel = channels[i % lobbies]
+        await mphandler.call_ext(PlayerJoined, channel, user="player", slot=1)
+    await client.scheduler.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "lobbies": lobbies,
+        "events_per_second": events / elapsed,
+        "callbacks_per_event": called / events,
+    }
+
+
+def run(lobbies: int = 200, events: int = 20000) -> dict:
+    return min(
+        (asyncio.run(dispatch(lobbies, events)) for _ in range(3)),
+        key=lambda r: -r["events_per_second"],
+    )
+
+
+def main():
+    r = run()
+    print(
+        f"{r['lobbies']} lobbies: {r['events_per_second']:,.0f} events/s, "
+        f"{r['callbacks_per_event']:.1f} callbacks/event"
+    )
+
+
+if __name__ == "__main__":
+    main()
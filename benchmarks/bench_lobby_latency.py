@@ -0,0 +1,104 @@
+"""
+端到端延遲：FakeBancho 送出 "All players are ready" 到收到機器人的 `!mp start`
+
+伺服器與機器人在同一個事件迴圈中執行，所以結果包含兩邊互相搶時間的影響。
+預設使用寬鬆的傳送限制，量的是 client 本身的處理路徑而不是 Bancho 的限制。
+
+    python -m benchmarks.bench_lobby_latency [秒數]
+"""
+
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+from osuirc import IrcClient, RateLimiter
+from osuirc.testing import FakeBancho, LoadGenerator
+from osuirc.utils.events import AllPlayerReady
+
+from .common import percentile
+
+NICK = "TourneyBot"
+
+
+class TimedBancho(FakeBancho):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.ready_at: Dict[str, float] = {}
+        self.latencies: List[float] = []
+
+    def broadcast(self, channel: str, sender: str, content: str, **kwargs) -> None:
+        if content == "All players are ready":
+            self.ready_at[channel] = time.perf_counter()
+        super().broadcast(channel, sender, content, **kwargs)
+
+    def _on_privmsg(self, session, rest: str) -> None:
+        target, _, content = rest.partition(" :")
+        if content[:9] == "!mp start" and (t := self.ready_at.pop(target, None)):
+            self.latencies.append(time.perf_counter() - t)
+        super()._on_privmsg(session, rest)
+
+
+async def measure(
+    duration: float, lobbies: int, lines_per_second: float, rate_limiter: RateLimiter
+) -> dict:
+    async with TimedBancho(play_time=0.2) as server:
+        bot = IrcClient(
+            NICK,
+            "",
+            host=server.host,
+            port=server.port,
+            reconnect=False,
+            rate_limiter=rate_limiter,
+        )
+
+        @bot.mp_listen(AllPlayerReady)
+        async def on_ready(event: AllPlayerReady):
+            await event.channel.send("!mp start")
+
+        bot.running = True
+        task = asyncio.create_task(bot.start())
+        await asyncio.wait_for(bot.connected.wait(), 5)
+
+        generator = LoadGenerator(
+            server, owner=NICK, lobbies=lobbies, lines_per_second=lines_per_second
+        )
+        generated = await generator.run(duration)
+        await asyncio.sleep(0.5)  # 等最後的 !mp start
+
+        bot.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    latencies = [t * 1000 for t in server.latencies]
+    return {
+        "generated": generated,
+        "starts": len(latencies),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "max_ms": max(latencies, default=0.0),
+        "stalls": rate_limiter.stalls,
+    }
+
+
+def run(
+    duration: float = 5.0,
+    lobbies: int = 10,
+    lines_per_second: float = 500.0,
+    rate_limiter: RateLimiter = None,
+) -> dict:
+    rate_limiter = rate_limiter or RateLimiter(public_rate=1000, public_burst=1000)
+    return asyncio.run(measure(duration, lobbies, lines_per_second, rate_limiter))
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    r = run(duration)
+    print(
+        f"{r['starts']} starts / {r['generated']} lines  "
+        f"p50={r['p50_ms']:.2f}ms p95={r['p95_ms']:.2f}ms max={r['max_ms']:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
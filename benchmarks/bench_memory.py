@@ -0,0 +1,134 @@
+"""
+記憶體用量：每個物件佔用的位元組與配置次數 (與同樣屬性存在 __dict__ 的版本比較)，
+以及分派大量訊息時的配置量與 GC 次數
+
+    python -m benchmarks.bench_memory
+"""
+
+import asyncio
+import gc
+import tracemalloc
+from typing import Dict, Tuple
+
+from osuirc.objects.channel import Channel, MpChannel
+from osuirc.objects.message import Message
+from osuirc.objects.slot import Slot
+from osuirc.utils.events import MatchSettingsUpdated, PlayerJoined
+from osuirc.objects.enums import Mods, TeamType
+
+from .bench_irc_dispatch import dispatch
+from .common import offline_client, synthetic_lines
+
+
+def traced() -> Tuple[int, int]:
+    """目前追蹤中的 (位元組, 配置數量)"""
+    stats = tracemalloc.take_snapshot().statistics("filename")
+    return sum(s.size for s in stats), sum(s.count for s in stats)
+
+
+def per_object(factory, count: int) -> Tuple[float, float]:
+    """建立 count 個物件並保留，回傳平均每個的 (位元組, 配置數量)"""
+    gc.collect()
+    tracemalloc.start()
+    before_bytes, before_blocks = traced()
+    objects = [factory(i) for i in range(count)]
+    after_bytes, after_blocks = traced()
+    tracemalloc.stop()
+    # 扣掉 list 本身
+    return (
+        (after_bytes - before_bytes - objects.__sizeof__()) / count,
+        (after_blocks - before_blocks - 1) / count,
+    )
+
+
+_dict_classes: Dict[type, type] = {}
+
+
+def dict_backed(obj: object) -> object:
+    """
+    同樣的屬性存在 __dict__ 中的物件，也就是改用 __slots__ 之前的配置方式。
+    每個類別各有一個對應的類別，讓 __dict__ 跟以前一樣共用 key。
+    """
+    cls = type(obj)
+    if (twin := _dict_classes.get(cls)) is None:
+        twin = _dict_classes[cls] = type(cls.__name__, (), {})
+    copy = twin()
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get("__slots__", ()):
+            if name == "__weakref__":
+                continue
+            if name[:2] == "__":
+                name = f"_{klass.__name__.lstrip('_')}{name}"
+            if hasattr(obj, name):
+                object.__setattr__(copy, name, getattr(obj, name))
+    return copy
+
+
+async def objects(count: int) -> dict:
+    # IrcClient 需要在事件迴圈中建立
+    client = offline_client()
+    user = client.get_user("BanchoBot")
+    channel = client.get_channel("#mp_1")
+    client.get_channel("#osu")
+
+    factories = {
+        "Message": lambda i: Message(client, user, "#osu", "hello"),
+        "Channel": lambda i: Channel(client, f"#c{i}"),
+        "MpChannel": lambda i: MpChannel(client, f"#mp_{i}"),
+        "Slot": lambda i: Slot("player", i, "Ready", False, TeamType.Red, Mods.NoFail),
+        "PlayerJoined": lambda i: PlayerJoined(channel, "player", i, TeamType.Blue),
+        "MatchSettingsUpdated": lambda i: MatchSettingsUpdated(
+            channel, {"player_count": (i, i + 1)}, ("player",), (), ()
+        ),
+    }
+    results = {}
+    for name, factory in factories.items():
+        slots_bytes, slots_blocks = per_object(factory, count)
+        dict_bytes, dict_blocks = per_object(lambda i: dict_backed(factory(i)), count)
+        results[name] = {
+            "object_bytes": slots_bytes,
+            "object_blocks": slots_blocks,
+            "dict_bytes": dict_bytes,
+            "dict_blocks": dict_blocks,
+        }
+    return results
+
+
+def traffic(count: int) -> dict:
+    lines = synthetic_lines(count)
+    gc.collect()
+    collections = sum(s["collections"] for s in gc.get_stats())
+    tracemalloc.start()
+    asyncio.run(dispatch(lines))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "lines": count,
+        "peak_bytes": peak,
+        "gc_collections": sum(s["collections"] for s in gc.get_stats()) - collections,
+    }
+
+
+def run(count: int = 10000, lines: int = 20000) -> dict:
+    return {"objects": asyncio.run(objects(count)), "dispatch": traffic(lines)}
+
+
+def main():
+    results = run()
+    print(f"{'':<22} {'__dict__':>14} {'__slots__':>14}")
+    for name, r in results["objects"].items():
+        saved = 1 - r["object_bytes"] / r["dict_bytes"]
+        print(
+            f"{name:<22} {r['dict_bytes']:>8.0f} bytes {r['object_bytes']:>8.0f} bytes"
+            f" ({saved:.0%} less), "
+            f"{r['dict_blocks']:.1f} -> {r['object_blocks']:.1f} allocations"
+        )
+    d = results["dispatch"]
+    print(
+        f"dispatch {d['lines']} lines: peak {d['peak_bytes'] / 1024:,.0f} KiB, "
+        f"{d['gc_collections']} gc collections"
+    )
+
+
+if __name__ == "__main__":
+    main()
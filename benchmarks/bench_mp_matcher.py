@@ -0,0 +1,133 @@
+"""
+BanchoBot 訊息分類：舊的逐一 regex 迴圈 vs LineMatcher，
+以及包含狀態更新的 MultiplayerHandler.__call__
+
+    python -m benchmarks.bench_mp_matcher [檔案]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from osuirc.objects.message import Message
+from osuirc.utils.matcher import LineMatcher
+from osuirc.utils.regex import *
+
+from .common import offline_client
+
+DATA = Path(__file__).parent / "data" / "tournament_lobby.txt"
+
+# 與 MultiplayerHandler.events 相同的順序
+PATTERNS = [
+    MP_LOCKED,
+    MP_UNLOCK,
+    MP_CHANGED_SIZE,
+    MP_CHANGED_SET,
+    MP_PLAYER_MOVED,
+    MP_CHANGED_HOST,
+    MP_CLEARHOST,
+    MP_HOST_SET,
+    MP_CHANGED_NAME,
+    MP_UPDATE_NAME,
+    MP_UPDATE_MAP,
+    MP_CHANGED_MAP,
+    MP_CHANGED_MAP2,
+    MP_UPDATE_SET,
+    MP_UPDATE_MODS,
+    MP_UPDATE_PC,
+    MP_SLOT_INFO,
+    MP_STARTED,
+    MP_ABORTED,
+    MP_CHANGED_TEAM,
+    MP_CHANGED_MODE,
+    MP_CHANGED_MODS,
+    MP_CHANGED_PASSWD,
+    MP_ADDED_REF,
+    MP_REMOVED_REF,
+    MP_KICKED,
+    MP_TIMER_START,
+    MP_TIMER_ABORT,
+    MP_BANNED,
+    MP_CLOSE,
+    MP_JOIN,
+    MP_LEFT,
+    MP_ALL_READY,
+    MP_FINISED_PLAYING,
+    MP_FINISED,
+    MP_ERR_STARTED,
+    MP_ERR_NOT_STARTED,
+    MP_ERR_MAP,
+    MP_ERR_SIZE,
+    MP_ERR_SETTINGS,
+    MP_ERR_USER,
+]
+
+
+def legacy(lines):
+    hits = 0
+    for line in lines:
+        for pattern in PATTERNS:
+            if pattern.match(line):
+                hits += 1
+    return hits
+
+
+def single_pass(matcher, lines):
+    hits = 0
+    for line in lines:
+        if matcher.match(line):
+            hits += 1
+    return hits
+
+
+async def mphandler(lines, repeat: int) -> float:
+    client = offline_client()
+    bancho = client.get_user("BanchoBot")
+    messages = [Message(client, bancho, "#mp_1", line) for line in lines]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            await client.mphandler(message)
+    await client.scheduler.join()
+    return time.perf_counter() - started
+
+
+def run(lines, repeat: int = 200) -> dict:
+    matcher = LineMatcher({p: None for p in PATTERNS})
+    results = {}
+    for name, func in (
+        ("legacy", lambda: legacy(lines)),
+        ("matcher", lambda: single_pass(matcher, lines)),
+    ):
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                hits = func()
+            best = min(best, time.perf_counter() - start)
+        results[name] = {
+            "lines_per_second": len(lines) * repeat / best,
+            "hits": hits,
+        }
+
+    repeat = max(1, repeat // 10)
+    best = min(asyncio.run(mphandler(lines, repeat)) for _ in range(3))
+    results["mphandler"] = {"lines_per_second": len(lines) * repeat / best}
+    return results
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA
+    lines = path.read_text(encoding="utf-8").splitlines()
+    results = run(lines)
+    for name, r in results.items():
+        hits = f"  hits={r['hits']}" if "hits" in r else ""
+        print(f"{name:<9} {r['lines_per_second']:>12,.0f} lines/s{hits}")
+    print(
+        f"speedup  {results['matcher']['lines_per_second'] / results['legacy']['lines_per_second']:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
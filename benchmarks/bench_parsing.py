@@ -0,0 +1,99 @@
+"""
+`Mods.from_str` 與整份 `!mp settings` 回覆的解析與套用
+
+    python -m benchmarks.bench_parsing
+"""
+
+import asyncio
+import time
+
+from osuirc.objects.enums import Mods
+from osuirc.objects.message import Message
+from osuirc.utils.regex import (
+    MP_SLOT_INFO,
+    MP_UPDATE_MAP,
+    MP_UPDATE_MODS,
+    MP_UPDATE_NAME,
+    MP_UPDATE_PC,
+    MP_UPDATE_SET,
+)
+
+from .common import best_of, lobby_lines, offline_client
+
+MOD_LISTS = [
+    ("Hidden",),
+    ("Hidden", "HardRock"),
+    ("DoubleTime", "Hidden", "Flashlight"),
+    ("NoFail", "Easy", "HalfTime"),
+    ("HardRock", "SuddenDeath", "Perfect"),
+]
+
+
+# !mp settings 回覆的每一行
+SETTINGS = (
+    MP_UPDATE_NAME,
+    MP_UPDATE_MAP,
+    MP_UPDATE_SET,
+    MP_UPDATE_MODS,
+    MP_UPDATE_PC,
+    MP_SLOT_INFO,
+)
+
+
+def settings_lines():
+    """紀錄中所有 !mp settings 回覆的行"""
+    return [
+        line
+        for line in lobby_lines()
+        if any(pattern.fullmatch(line) for pattern in SETTINGS)
+    ]
+
+
+async def apply_settings(lines, repeat: int) -> float:
+    client = offline_client()
+    bancho = client.get_user("BanchoBot")
+    messages = [Message(client, bancho, "#mp_1", line) for line in lines]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            await client.mphandler(message)
+    return time.perf_counter() - started
+
+
+def run(repeat: int = 2000) -> dict:
+    def from_str():
+        for _ in range(repeat):
+            for mods in MOD_LISTS:
+                Mods.from_str(*mods)
+
+    best = best_of(from_str)
+    results = {
+        "mods_from_str": {"calls_per_second": len(MOD_LISTS) * repeat / best},
+    }
+
+    lines = settings_lines()
+    blocks = sum(1 for line in lines if MP_UPDATE_NAME.fullmatch(line))
+    repeat = max(1, repeat // 20)
+    best = min(asyncio.run(apply_settings(lines, repeat)) for _ in range(3))
+    results["settings"] = {
+        "lines": len(lines),
+        "lines_per_second": len(lines) * repeat / best,
+        "replies_per_second": blocks * repeat / best,
+    }
+    return results
+
+
+def main():
+    results = run()
+    print(
+        f"Mods.from_str  {results['mods_from_str']['calls_per_second']:>12,.0f} calls/s"
+    )
+    settings = results["settings"]
+    print(
+        f"!mp settings   {settings['lines_per_second']:>12,.0f} lines/s"
+        f" ({settings['replies_per_second']:,.0f} replies/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 from .client import IrcClient
+from .metrics import Metrics
+from .watchdog import Watchdog
 from .objects.channel import Channel, MpChannel
 from .objects.message import Message
-from .objects.enums import GameMode, Mods, ScoreMode, TeamMode
+from .objects.enums import GameMode, Mods, Priority, ScoreMode, TeamMode
 from .objects.slot import Slot, Slots
+from .pool import ClientPool
+from .provision import MatchTemplate, provision
+from .ratelimit import RateLimiter, TokenBucket
+from .recorder import Replayer, TrafficRecorder
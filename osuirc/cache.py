@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from weakref import WeakValueDictionary
+
+if TYPE_CHECKING:
+    from .objects.user import User
+
+
+class UserCache:
+    """
+    有容量與存活時間上限的 LRU 使用者快取。
+
+    被移除的 User 如果還有人在用(例如 Message.author)，下次查詢會拿回同一個物件，
+    不會出現兩個代表同一人的 User。
+    """
+
+    def __init__(self, capacity: int = 10000, ttl: float = 3600.0) -> None:
+        self.capacity: int = capacity
+        self.ttl: float = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._alive: "WeakValueDictionary[str, User]" = WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, username: str) -> bool:
+        # 只檢查，不計入命中率也不更新 LRU 順序
+        entry = self._entries.get(username)
+        if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+            return True
+        return username in self._alive
+
+    def __getitem__(self, username: str) -> "User":
+        if (user := self.get(username)) is None:
+            raise KeyError(username)
+        return user
+
+    def __setitem__(self, username: str, user: "User") -> None:
+        now = time.monotonic()
+        self._alive[username] = user
+        self._entries[username] = (now, user)
+        self._entries.move_to_end(username)
+        self._evict(now)
+
+    def get(self, username: str, default: "User" = None) -> Optional["User"]:
+        now = time.monotonic()
+        if entry := self._entries.get(username):
+            if now - entry[0] <= self.ttl:
+                self._entries[username] = (now, entry[1])
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return entry[1]
+            del self._entries[username]
+            self.evictions += 1
+
+        if (user := self._alive.get(username)) is not None:
+            self._entries[username] = (now, user)
+            self._evict(now)
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        return default
+
+    def _evict(self, now: float) -> None:
+        # 最前面的是最久沒用到的
+        entries = self._entries
+        while entries and (
+            len(entries) > self.capacity
+            or now - next(iter(entries.values()))[0] > self.ttl
+        ):
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "alive": len(self._alive),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
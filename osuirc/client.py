@@ -1,13 +1,38 @@
 import asyncio
 import logging
-from typing import Any, Dict, TypeVar, Union, Callable
-
+import random
+import time
+from typing import (
+    Any,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    Callable,
+)
+
+from .cache import UserCache
 from .handler import IrcHandler, MultiplayerHandler
+from .listeners import EventStream, Listener, wait_for
+from .metrics import Metrics
 from .objects.channel import Channel, MpChannel
+from .objects.enums import Priority
 from .objects.message import Message
 from .objects.user import User
+from .protocol import IrcProtocol, IrcWriter
+from .ratelimit import RateLimiter
+from .recorder import TrafficRecorder
+from .resolver import UserResolver
+from .scheduler import Scheduler
+from .store import UserStore
+from .sendqueue import SendQueue
 from .utils.errors import EmptyError
 from .utils.events import BaseMatchEvent, ClientEvents
+from .utils.parser import parse_line
+from .watchdog import Watchdog
 
 
 MatchEvent = TypeVar("MatchEvent", bound=BaseMatchEvent)
@@ -20,27 +45,67 @@ class IrcClient:
         nickname: str,
         password: str,
         *,
+        host: str = "cho.ppy.sh",
+        port: int = 6667,
         debug: bool = False,
         prefix: str = "!",
         api_key: str = None,
+        rate_limiter: RateLimiter = None,
+        users_cache_size: int = 10000,
+        users_cache_ttl: float = 3600.0,
+        user_store: Union[UserStore, str] = None,
+        whois_rate: float = 2.0,
+        whois_burst: float = 10,
+        reconnect: bool = True,
+        reconnect_delay: float = 1.0,
+        reconnect_max_delay: float = 300.0,
+        outage_policy: str = "keep",
+        resync_interval: float = 2.0,
+        recorder: TrafficRecorder = None,
+        metrics_port: int = None,
+        watchdog: Union[Watchdog, bool] = False,
     ) -> None:
         # static
-        self.host: str = "cho.ppy.sh"
-        self.port: int = 6667
+        self.host: str = host
+        self.port: int = port
         self.encoding: str = "UTF-8"
         self.nickname: str = nickname
         self.password: str = password
         self.api_key: str = api_key
         self.prefix: str = prefix
         self.debug: bool = debug
-        self.limit: float = 1.0
+        self.rate_limiter: RateLimiter = rate_limiter or RateLimiter()
         self.running: bool = False
         self.loop = asyncio.get_event_loop()
 
+        # 斷線重連
+        self.reconnect: bool = reconnect
+        self.reconnect_delay: float = reconnect_delay
+        self.reconnect_max_delay: float = reconnect_max_delay
+        self.outage_policy: str = outage_policy  # keep: 保留斷線期間的訊息, drop: 丟棄
+        self.resync_interval: float = resync_interval  # 每個房間 !mp settings 的間隔
+        self.connections: int = 0
+        self.disconnects: int = 0
+
         self.channels: Dict[str, Union[Channel, MpChannel]] = {}
         self.commands: Dict[str, Callable] = {}
-        self.users_cache: Dict[str, User] = {}
-
+        self.users_cache: UserCache = UserCache(users_cache_size, users_cache_ttl)
+        self.user_store: UserStore = (
+            UserStore(user_store) if isinstance(user_store, str) else user_store
+        )
+
+        self.recorder: TrafficRecorder = recorder
+        self.metrics: Metrics = Metrics(self)
+        # 設定時在這個 port 提供 Prometheus 的 /metrics
+        self.metrics_port: int = metrics_port
+        self.watchdog: Watchdog = Watchdog() if watchdog is True else watchdog or None
+        self.writer: IrcWriter = None
+        self.events = ClientEvents()
+        self.connected = asyncio.Event()
+        self.writable = asyncio.Event()  # 有 writer (已連線，不一定已登入)
+        self.sendmsg_queue = SendQueue()
+        self.scheduler = Scheduler()
+        self.resolver = UserResolver(self, rate=whois_rate, burst=whois_burst)
         self.handler = IrcHandler(self)
         self.mphandler = MultiplayerHandler(self)
 
@@ -58,30 +123,140 @@ class IrcClient:
         self.running = False
 
     async def start(self):
+        sender = asyncio.create_task(self.sender())
+        metrics_server = None
+        if self.metrics_port is not None:
+            metrics_server = await self.metrics.serve(port=self.metrics_port)
+        if self.watchdog is not None:
+            self.watchdog.start()
+
+        attempt = 0
+        try:
+            while self.running:
+                try:
+                    await self.connect()
+                    await self.listen()
+                except (EmptyError, OSError) as e:
+                    if not self.reconnect:
+                        raise
+                    log.warning("連線中斷: %r", e)
+                finally:
+                    self.disconnect()
+
+                if not self.running:
+                    break
+
+                if self.events.welcome.is_set():
+                    attempt = 0  # 成功登入過才重設
+                # 指數退避加上隨機抖動，避免伺服器重啟後所有機器人同時重連
+                delay = min(self.reconnect_max_delay, self.reconnect_delay * 2**attempt)
+                delay *= random.uniform(0.5, 1.0)
+                attempt += 1
+                log.info("%.1f 秒後重新連線 (第 %s 次)", delay, attempt)
+                await asyncio.sleep(delay)
+        finally:
+            sender.cancel()
+            if metrics_server is not None:
+                metrics_server.close()
+            if self.watchdog is not None:
+                self.watchdog.stop()
+            if self.user_store is not None:
+                # 寫入最後一批，`await client.start()` 結束時也不會遺失
+                await self.user_store.close()
+            if self.recorder is not None:
+                self.recorder.close()
+
+    async def connect(self):
         self.events = ClientEvents()
-        self.sendmsg_queue = asyncio.Queue()
-
-        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        transport, self.protocol = await asyncio.get_running_loop().create_connection(
+            lambda: IrcProtocol(self.encoding), self.host, self.port
+        )
+        self.writer = IrcWriter(transport, self.protocol, self.encoding)
+        self.writable.set()
+        self.connections += 1
 
         await self.send_command(f"PASS {self.password}")
         await self.send_command(f"NICK {self.nickname}")
 
-        await asyncio.gather(self.listen(), self.sender())
+    @property
+    def in_outage(self) -> bool:
+        """連線過後斷線，還沒有重新登入"""
+        return self.disconnects > 0 and not self.connected.is_set()
+
+    def disconnect(self):
+        self.disconnects += 1
+        self.connected.clear()
+        self.writable.clear()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.resolver.requeue()
+        if self.outage_policy == "drop":
+            self.sendmsg_queue.clear()
+
+    async def resync(self):
+        """重新連線後重新加入頻道，並逐一以 !mp settings 更新房間狀態"""
+        channels = [c for c in self.channels.values() if c.joined]
+        for channel in channels:
+            await self.send_command(f"JOIN {channel.name}")
+        self.connected.set()  # 重新加入後才送出斷線期間保留的訊息
+
+        for channel in channels:
+            if isinstance(channel, MpChannel) and channel.joined:
+                await channel.request_refresh(priority=Priority.Bulk)
+                await asyncio.sleep(self.resync_interval)
 
     async def send_command(self, content: str):
-        self.writer.write((content + "\r\n").encode(self.encoding))
-        log.debug(f"SEND_COMMAND: {content=}")
+        # 斷線期間等到重新連線後才送出
+        while (writer := self.writer) is None:
+            await self.writable.wait()
+        writer.write(content)
+        if self.recorder is not None:
+            self.recorder.outbound(content)
+        log.debug("SEND_COMMAND: content=%r", content)
+        await writer.drain()
 
     async def send(
-        self, target, content: str, *, action: bool = False, ignore_limit: bool = False
+        self,
+        target,
+        content: str,
+        *,
+        action: bool = False,
+        ignore_limit: bool = False,
+        priority: Priority = None,
     ):
         _content = f"\x01ACTION {content}\x01" if action else content
-        task = self.send_command(f"PRIVMSG {target} :{_content}")
+        command = f"PRIVMSG {target} :{_content}"
+
+        if self.outage_policy == "drop" and self.in_outage:
+            log.debug("DROP: target=%r content=%r", target, content)
+            return
 
         if not ignore_limit:
-            self.sendmsg_queue.put_nowait(task)
+            if priority is None:
+                # 裁判指令優先於一般聊天
+                priority = (
+                    Priority.Critical if content[:3] == "!mp" else Priority.Normal
+                )
+            self.sendmsg_queue.put_nowait(target, command, priority)
         else:
-            await task
+            self.rate_limiter.consume(target)
+            await self.send_command(command)
+
+    async def make_match(
+        self, name: str, *, private: bool = False, timeout: float = 10.0
+    ) -> MpChannel:
+        """
+        !mp make/makeprivate，等到 BanchoBot 回覆建立成功才回傳房間。
+        已達開房上限時丟出 MatchCommandError。
+        """
+        command = f"!mp {'makeprivate' if private else 'make'} {name}"
+        pending = self.mphandler.expect_make(name, command)
+        try:
+            await self.send("BanchoBot", command)
+            return await asyncio.wait_for(pending.future, timeout)
+        finally:
+            self.mphandler.forget_make(pending)
 
     async def join(self, channel: Union[Channel, str]):
         if isinstance(channel, Channel):
@@ -105,17 +280,52 @@ class IrcClient:
 
     async def listen(self):
         while self.running:
-            if raw := await self.reader.readline():
-                payload = raw.decode(self.encoding).strip()
-                asyncio.create_task(self.handler(payload))
-            else:
+            if (batch := await self.protocol.read_batch()) is None:
                 raise EmptyError("空資料")
+            await self.feed(batch)
+
+    async def feed(self, batch: List[str]):
+        """把收到的訊息放進各頻道的處理佇列"""
+        if self.recorder is not None:
+            for payload in batch:
+                self.recorder.inbound(payload)
+
+        for payload in batch:
+            line = parse_line(payload)
+            await self.scheduler.submit(
+                line.channel if line else "", self.handler(payload, line)
+            )
 
     async def sender(self):
         while self.running:
-            task = await self.sendmsg_queue.get()
-            await task
-            await asyncio.sleep(self.limit)
+            target, command, queued_at = await self.sendmsg_queue.get()
+            await self.rate_limiter.acquire(target)
+            if not self.connected.is_set():
+                await self.connected.wait()  # 斷線期間先保留
+                if self.outage_policy == "drop" and self.disconnects:
+                    # 拿出來之後才斷線，也算是斷線期間的訊息
+                    log.debug("DROP: command=%r", command)
+                    continue
+            await self.send_command(command)
+            self.metrics.send_wait.observe(time.monotonic() - queued_at)
+
+    def dispatch(
+        self,
+        coro: Coroutine,
+        event: str = "",
+        channel: str = "",
+        name: str = None,
+        *,
+        shed: bool = True,
+    ) -> Optional[asyncio.Task]:
+        """
+        在背景執行使用者的回呼，開啟 watchdog 時會計時。
+        `shed=True` 的回呼在背景工作達到上限時會被丟棄 (見 `Scheduler`)。
+        """
+        # 會被丟棄的回呼不用包裝，避免內層的 coroutine 沒有被 await
+        if self.watchdog is not None and not (shed and self.scheduler.saturated):
+            coro = self.watchdog.watch(coro, name, event, channel)
+        return self.scheduler.spawn(coro, shed=shed)
 
     def get_channel(self, channel_name: str) -> Union[Channel, MpChannel]:
         if channel_name[0] != "#":
@@ -129,18 +339,100 @@ class IrcClient:
                 self, channel_name
             )
             self.channels[channel_name] = channel
-            log.debug(f"NEW_CHANNEL: {channel=}")
+            log.debug("NEW_CHANNEL: channel=%r", channel)
 
         return channel
 
+    def get_user(self, username: str) -> User:
+        user = self.users_cache.get(username)
+        if user is None:
+            user = self.users_cache[username] = User(self, username)
+        return user
+
     def command(self, name: str = None):
         def wapper(func):
             cmd_name = name or func.__name__
             self.commands[cmd_name] = func
+            return func
 
         return wapper
 
-    def mp_listen(self, event: MatchEvent):
+    def add_listener(
+        self,
+        event: Type[MatchEvent],
+        callback: Callable[[MatchEvent], Any],
+        *,
+        channel: Union[MpChannel, str] = None,
+        check: Callable[[MatchEvent], bool] = None,
+    ) -> Listener:
+        """訂閱事件，回傳的 Listener 可以交給 `remove_listener` 取消"""
+        if isinstance(channel, Channel):
+            channel = channel.name
+        return self.mphandler.listeners.add(Listener(event, callback, channel, check))
+
+    def remove_listener(self, listener: Listener) -> bool:
+        return self.mphandler.listeners.remove(listener)
+
+    async def wait_for(
+        self,
+        event: Type[MatchEvent],
+        *,
+        channel: Union[MpChannel, str] = None,
+        check: Callable[[MatchEvent], bool] = None,
+        timeout: float = None,
+    ) -> MatchEvent:
+        """
+        等待下一個符合的事件並回傳，逾時丟出 asyncio.TimeoutError。
+
+        ```PY
+        await bot.wait_for(AllPlayerReady, channel=channel, timeout=120)
+        await channel.start(10)
+        await bot.wait_for(MatchFinished, channel=channel)
+        ```
+        """
+        if isinstance(channel, Channel):
+            channel = channel.name
+        return await wait_for(self.mphandler.listeners, event, channel, check, timeout)
+
+    def stream(
+        self,
+        event: Type[MatchEvent],
+        *,
+        channel: Union[MpChannel, str] = None,
+        check: Callable[[MatchEvent], bool] = None,
+        maxsize: int = 100,
+        policy: str = "drop",
+        block_timeout: float = 5.0,
+    ) -> EventStream:
+        """
+        以 async for 依序讀取事件，`policy`、`block_timeout` 見 `EventStream`。
+        `policy="block"` 時不要在 async for 中 await 同一個房間的指令。
+
+        ```PY
+        async with bot.stream(PlayerFinished, channel=channel) as results:
+            async for result in results:
+                ...
+        ```
+        """
+        if isinstance(channel, Channel):
+            channel = channel.name
+        return EventStream(
+            self.mphandler.listeners,
+            event,
+            channel,
+            check,
+            maxsize=maxsize,
+            policy=policy,
+            block_timeout=block_timeout,
+        )
+
+    def mp_listen(
+        self,
+        event: Type[MatchEvent],
+        *,
+        channel: Union[MpChannel, str] = None,
+        check: Callable[[MatchEvent], bool] = None,
+    ):
         """
         ## MP處理擴充
         範例:
@@ -153,27 +445,31 @@ class IrcClient:
         async def on_ready(event):
             await event.channel.send('!mp start 10')
         ```
+
+        `channel` 只訂閱一個房間，房間關閉 (MatchClosed) 或離開頻道時自動取消；
+        `check` 回傳 False 的事件不會觸發回呼。訂閱父類別 (例如 `BaseMatchEvent`)
+        會收到所有子類別的事件。
         """
 
         def decorator(func: Callable[[MatchEvent], Any]):
-            if mpevt := self.mphandler.ext_events.get(event):
-                mpevt.add(func)
-            else:
-                self.mphandler.ext_events[event] = set([func])
+            self.add_listener(event, func, channel=channel, check=check)
+            return func
 
         return decorator
 
     async def call_command(self, ctx: Message):
-        if ctx.content[0] == "!":
+        # BanchoBot 的房間訊息由 IrcHandler 直接交給 mphandler 處理
+        if ctx.content.startswith(self.prefix):
             ctx_split = ctx.content.removeprefix(self.prefix).split()
+            if not ctx_split:
+                return
             cmd = ctx_split[0]
             args = ctx_split[1:]
 
             if command := self.commands.get(cmd):
-                return asyncio.create_task(command(ctx, *args))
-        else:
-            if ctx.author.username == "BanchoBot" and not ctx.is_private:
-                return asyncio.create_task(self.mphandler(ctx))
+                return self.dispatch(
+                    command(ctx, *args), "command", ctx.channel.name, shed=False
+                )
 
     # Events
 
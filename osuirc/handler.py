@@ -1,13 +1,18 @@
 import asyncio
 import logging
 import re
+from collections import deque
+from time import perf_counter
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
+    Deque,
     Dict,
+    List,
+    Optional,
     Pattern,
-    Set,
+    Tuple,
     TypeVar,
     Union,
 )
@@ -17,19 +22,30 @@ from osuirc.objects.osu import Beatmap
 
 from .objects.message import Message
 from .objects.enums import GameMode, Mods, ScoreMode, TeamMode, TeamType
-from .objects.user import User
-from .utils.errors import LoginFailError
+from .utils.errors import LoginFailError, MatchCommandError
+from .listeners import Listener, ListenerIndex
 from .utils.events import *
+from .utils.matcher import LineMatcher
+from .utils.parser import IrcLine, parse_line
 from .utils.regex import *
 
 if TYPE_CHECKING:
     from .client import IrcClient
     from .objects.channel import MpChannel
+    from .objects.slot import Slot
 
 MatchEventT = TypeVar("MatchEventT", bound=BaseMatchEvent)
 log = logging.getLogger("IrcClient")
 
 
+def _whois_user_id(line: IrcLine) -> str:
+    # 311 的第三個參數是 https://osu.ppy.sh/u/<id>
+    url = line.params[2]
+    if not url.startswith("https://osu.ppy.sh/u/"):
+        raise ValueError(url)
+    return url[21:]
+
+
 class IrcHandler:
     def __init__(self, client: "IrcClient") -> None:
         self.client: "IrcClient" = client
@@ -53,19 +69,77 @@ class IrcHandler:
             ENDOFWHOIS: self.on_endofwhois,
         }
 
-    async def __call__(self, payload: str) -> None:
-        for pattern in self.events:
-            if m := re.match(pattern, payload):
-                return await self.events[pattern](*m.groups())
+        # command/數字代碼 -> (處理程序, 從 IrcLine 取出參數)
+        # 取參數失敗(IndexError/ValueError)時退回上面的 regex 比對
+        self.commands: Dict[str, Tuple[Callable, Callable[[IrcLine], tuple]]] = {
+            "001": (self.on_welcome, lambda l: ()),
+            "375": (self.on_motd, lambda l: (l.command, l.params[-1])),
+            "372": (self.on_motd, lambda l: (l.command, l.params[-1])),
+            "376": (self.on_motd, lambda l: (l.command, l.params[-1])),
+            "PING": (self.on_ping, lambda l: (l.params[0],)),
+            "QUIT": (self.on_quit, lambda l: (l.nick, l.params[-1])),
+            "JOIN": (self.on_join, lambda l: (l.nick, l.params[0])),
+            "PART": (self.on_part, lambda l: (l.nick, l.params[0])),
+            "MODE": (
+                self.on_mode,
+                lambda l: (l.nick, l.params[0], l.params[1], l.params[2]),
+            ),
+            "PRIVMSG": (
+                self.on_message,
+                lambda l: (l.nick, l.params[0], l.params[1]),
+            ),
+            "332": (self.on_chtopic, lambda l: (l.params[1], l.params[2])),
+            "333": (self.on_chtime, lambda l: (l.params[1], l.params[3])),
+            "353": (self.on_chusers, lambda l: (l.params[2], l.params[3])),
+            "366": (self.on_endofnames, lambda l: (l.params[1],)),
+            "311": (self.on_whoisuser, lambda l: (l.params[1], _whois_user_id(l))),
+            "312": (
+                self.on_whoisserver,
+                lambda l: (l.params[1], l.params[2], l.params[3]),
+            ),
+            "319": (self.on_whoischannels, lambda l: (l.params[1], l.params[2])),
+            "318": (self.on_endofwhois, lambda l: (l.params[1],)),
+            "401": (self.on_nosuchnick, lambda l: (l.params[1],)),
+            "403": (self.on_nosuchchannel, lambda l: (l.params[1],)),
+        }
 
-        log.debug(f"NOT PROCESSED: {payload=}")  # 無處理方式的訊息
+    async def __call__(self, payload: str, line: Optional[IrcLine] = None) -> None:
+        if line is None:
+            line = parse_line(payload)
+
+        metrics = self.client.metrics
+        metrics.lines[line.command if line is not None else ""] += 1
+
+        handler = None
+        if line is not None and (entry := self.commands.get(line.command)):
+            handler, get_args = entry
+            try:
+                args = get_args(line)
+            except (IndexError, ValueError):
+                handler = None
+
+        if handler is None:
+            # 奇怪的伺服器訊息才會走到這裡
+            for pattern, handler in self.events.items():
+                if m := pattern.match(payload):
+                    args = m.groups()
+                    break
+            else:
+                log.debug("NOT PROCESSED: payload=%r", payload)  # 無處理方式的訊息
+                return
+
+        started = perf_counter()
+        try:
+            await handler(*args)
+        finally:
+            metrics.observe_handler(handler.__qualname__, perf_counter() - started)
 
     async def nothing(self, *_):
         return
 
     async def on_welcome(self):
         self.client.events.welcome.set()
-        asyncio.create_task(self.on_ready())
+        self.client.scheduler.spawn(self.on_ready())
 
     async def on_motd(self, code: str, message: str):
         log.debug(message)
@@ -80,95 +154,197 @@ class IrcHandler:
         await self.client.events.welcome.wait()
         await self.client.events.motd_start.wait()
         await self.client.events.motd_end.wait()
-        asyncio.create_task(self.client.on_ready())
+        if self.client.connections > 1:
+            self.client.scheduler.spawn(self.client.resync())
+        else:
+            self.client.connected.set()
+        self.client.dispatch(self.client.on_ready(), "on_ready", shed=False)
         log.debug("ON_READY.")
 
     async def on_login_fail(self, message: str):
-        log.debug(f"ON_LOGIN_FAIL: {message=}")
+        log.debug("ON_LOGIN_FAIL: message=%r", message)
         raise LoginFailError()
 
     async def on_ping(self, content: str):
         await self.client.send_command(f"PONG {content}")
-        asyncio.create_task(self.client.on_ping(content))
-        log.debug(f"ON_PING: {content=}")
+        self.client.dispatch(self.client.on_ping(content), "on_ping")
+        log.debug("ON_PING: content=%r", content)
 
     async def on_quit(self, user: str, reason: str):
-        asyncio.create_task(self.client.on_quit(user, reason))
+        self.client.dispatch(self.client.on_quit(user, reason), "on_quit")
 
     async def on_join(self, user: str, channel_name: str):
         channel = self.client.get_channel(channel_name)
         channel.users.add(user)
-        asyncio.create_task(self.client.on_join(user, channel))
-        log.debug(f"ON_JOIN: {user=} {channel_name=}")
+        self.client.dispatch(
+            self.client.on_join(user, channel), "on_join", channel.name
+        )
+        log.debug("ON_JOIN: user=%r channel_name=%r", user, channel_name)
 
     async def on_part(self, user: str, channel_name: str):
-        channel = self.client.channels[channel_name]
+        channel = self.client.get_channel(channel_name)
         channel.users.discard(user)
         if user.lower() == self.client.nickname.lower():
             channel.joined = False
-        asyncio.create_task(self.client.on_part(user, channel))
-        log.debug(f"ON_PART: {user=} {channel_name=}")
+            if channel.name[:4] == "#mp_":
+                await self.client.mphandler.call_ext(MatchParted, channel)
+            self.client.mphandler.listeners.discard_channel(channel.name)
+        self.client.dispatch(
+            self.client.on_part(user, channel), "on_part", channel.name
+        )
+        log.debug("ON_PART: user=%r channel_name=%r", user, channel_name)
 
     async def on_message(self, sender: str, target: str, content: str):
-        if not (user := self.client.users_cache.get(sender)):
-            user = User(self.client, sender)
-            self.client.users_cache[sender] = user
+        user = self.client.get_user(sender)
         context = Message(self.client, user, target, content)
         if sender == self.client.nickname:
             if content[0] == ":":
                 await self.client.send_command(content[1:])
-        asyncio.create_task(self.client.on_message(context))
-        log.debug(f"ON_MESSAGE: {user=} {target=} {content=}")
+        if sender == "BanchoBot":
+            if context.is_private:
+                await self.client.mphandler.private(context)
+            else:
+                # 房間狀態在頻道的佇列中依序更新
+                await self.client.mphandler(context)
+        self.client.dispatch(self.client.on_message(context), "on_message", target)
+        log.debug("ON_MESSAGE: user=%r target=%r content=%r", user, target, content)
 
     async def on_mode(self, admin: str, channel_name: str, mode: str, user: str):
-        log.debug(f"ON_MODE: {admin=} {channel_name=} {mode=} {user=}")
+        log.debug(
+            "ON_MODE: admin=%r channel_name=%r mode=%r user=%r",
+            admin,
+            channel_name,
+            mode,
+            user,
+        )
 
     async def on_chtopic(self, channel_name: str, topic: str):
         channel = self.client.channels[channel_name]
         if m := re.match(MP_GAMEID, topic):
             game_id = int(m.group(1))
             channel.game_id = game_id
-        log.debug(f"ON_CHANNEL_TOPIC: {channel_name=} {topic=}")
+        log.debug("ON_CHANNEL_TOPIC: channel_name=%r topic=%r", channel_name, topic)
 
     async def on_chtime(self, channel_name: str, time: int):
         channel = self.client.channels[channel_name]
         channel.created_time = float(time)
-        log.debug(f"ON_CHANNEL_CREATED_TIME: {channel_name=} {time=}")
+        log.debug(
+            "ON_CHANNEL_CREATED_TIME: channel_name=%r time=%r", channel_name, time
+        )
 
     async def on_chusers(self, channel_name: str, users: str):
         channel = self.client.channels[channel_name]
         channel.users = set(
             (u.removeprefix("@").removeprefix("+") for u in users.split())
         )
-        log.debug(f"ON_CHANNEL_USERS: {channel_name=} {users=}")
+        log.debug("ON_CHANNEL_USERS: channel_name=%r users=%r", channel_name, users)
 
     async def on_endofnames(self, channel_name: str):
-        log.debug(f"ON_ENDOFNAMES: {channel_name=}")
+        log.debug("ON_ENDOFNAMES: channel_name=%r", channel_name)
         channel = self.client.channels[channel_name]
-        log.debug(f"channel={channel.__dict__}")
+        log.debug("channel=%r", channel)
 
     async def on_whoisuser(self, username: str, user_id: str):
-        user = self.client.users_cache[username]
-        user.user_id = int(user_id)
-        log.debug(f"ON_WHOISUSER: {username=} {user_id=}")
+        self.client.resolver.feed(username, int(user_id))
+        log.debug("ON_WHOISUSER: username=%r user_id=%r", username, user_id)
 
     async def on_whoisserver(self, username: str, host: str, server_info: str):
-        log.debug(f"ON_WHOISSERVER: {username=} {host=} {server_info=}")
+        log.debug(
+            "ON_WHOISSERVER: username=%r host=%r server_info=%r",
+            username,
+            host,
+            server_info,
+        )
 
     async def on_whoischannels(self, username: str, channels: str):
-        log.debug(f"ON_WHOISCHANNELS: {username=} {channels=}")
+        log.debug("ON_WHOISCHANNELS: username=%r channels=%r", username, channels)
 
     async def on_endofwhois(
         self,
         username: str,
     ):
-        log.debug(f"ON_ENDOFWHOIS: {username=} End of /WHOIS list")
+        # 沒有收到 311 的查詢就此結束
+        self.client.resolver.fail(username)
+        log.debug("ON_ENDOFWHOIS: username=%r End of /WHOIS list", username)
+
+    async def on_nosuchchannel(self, channel_name: str):
+        # 例如斷線期間已關閉的房間
+        if channel := self.client.channels.get(channel_name):
+            channel.joined = False
+        log.debug("ON_NOSUCHCHANNEL: channel_name=%r", channel_name)
+
+    async def on_nosuchnick(self, username: str):
+        self.client.resolver.fail(username)
+        log.debug("ON_NOSUCHNICK: username=%r", username)
+
+
+def _parse_beatmap(map_id: str, map_repl: str) -> Beatmap:
+    artist, _, title = map_repl.partition(" - ")
+    version = ""  # !mp map 的回覆沒有難度名稱
+    if title.endswith("]"):
+        # 有些地圖名稱會有 [xxx] 這種東西，難度是最後一個
+        title, _, version = title[:-1].rpartition(" [")
+    return Beatmap(id=int(map_id), artist=artist, title=title, version=version)
+
+
+def _slot_state(number: int, slot: "Slot") -> tuple:
+    return (
+        number,
+        slot.status,
+        slot.is_host,
+        slot.team,
+        slot.enabled_mods,
+    )
+
+
+class _SettingsSnapshot:
+    """收集中的一份 !mp settings 回覆，None 表示回覆中沒有這一行"""
+
+    __slots__ = (
+        "room_name",
+        "current_map",
+        "team_mode",
+        "score_mode",
+        "active_mods",
+        "freemod",
+        "player_count",
+        "slots",
+    )
+
+    def __init__(self) -> None:
+        self.room_name: Optional[str] = None
+        self.current_map: Optional[Beatmap] = None
+        self.team_mode: Optional[TeamMode] = None
+        self.score_mode: Optional[ScoreMode] = None
+        self.active_mods: Mods = Mods.NoMod  # 沒有 Active mods 行表示沒有 mod
+        self.freemod: bool = False
+        self.player_count: Optional[int] = None
+        self.slots: List[tuple] = []
+
+
+class _PendingCommand:
+    """等待回覆的 !mp 指令，patterns: pattern -> 是否為成功的回覆"""
+
+    __slots__ = ("command", "future", "patterns")
+
+    def __init__(
+        self,
+        command: str,
+        success: Tuple[Pattern[str], ...],
+        failures: Tuple[Pattern[str], ...],
+    ) -> None:
+        self.command: str = command
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.patterns: Dict[Pattern[str], bool] = {
+            **dict.fromkeys(failures, False),
+            **dict.fromkeys(success, True),
+        }
 
 
 class MultiplayerHandler:
     def __init__(self, client: "IrcClient") -> None:
         self.client = client
-        self.ext_events: Dict[MatchEventT, Set[Callable[[MatchEventT], Any]]] = {}
+        self.listeners: ListenerIndex = ListenerIndex()
         self.events: Dict[Pattern[str], Callable] = {
             MP_LOCKED: self.on_lock,
             MP_UNLOCK: self.on_unlock,
@@ -177,13 +353,15 @@ class MultiplayerHandler:
             MP_PLAYER_MOVED: self.on_move,
             MP_CHANGED_HOST: self.on_change_host,
             MP_CLEARHOST: self.on_change_host,
+            MP_HOST_SET: self.on_host_set,
             MP_CHANGED_NAME: self.update_room_name,
-            MP_UPDATE_NAME: self.update_room_name,
-            MP_UPDATE_MAP: self.update_current_map,
+            MP_UPDATE_NAME: self.on_settings_name,
+            MP_UPDATE_MAP: self.on_settings_map,
             MP_CHANGED_MAP: self.update_current_map,
             MP_CHANGED_MAP2: self.update_current_map,
-            MP_UPDATE_SET: self.update_settings,
-            MP_UPDATE_PC: self.update_player_count,
+            MP_UPDATE_SET: self.on_settings_mode,
+            MP_UPDATE_MODS: self.on_settings_mods,
+            MP_UPDATE_PC: self.on_settings_players,
             MP_SLOT_INFO: self.update_palyer,
             MP_STARTED: self.on_start,
             MP_ABORTED: self.on_abort,
@@ -203,19 +381,159 @@ class MultiplayerHandler:
             MP_ALL_READY: self.on_ready,
             MP_FINISED_PLAYING: self.on_result,
             MP_FINISED: self.on_finished,
+            MP_ERR_STARTED: self.on_command_error,
+            MP_ERR_NOT_STARTED: self.on_command_error,
+            MP_ERR_MAP: self.on_command_error,
+            MP_ERR_SIZE: self.on_command_error,
+            MP_ERR_SETTINGS: self.on_command_error,
+            MP_ERR_USER: self.on_command_error,
         }
+        self.matcher = LineMatcher(self.events)
+        # 頻道名稱 -> 收集中的 !mp settings 回覆
+        self.settings: Dict[str, _SettingsSnapshot] = {}
+        # BanchoBot 的私訊
+        self.private_matcher = LineMatcher(
+            {
+                MP_CREATED: self.on_make,
+                MP_ERR_MAKE: self.on_make_fail,
+            }
+        )
+        # 等待建立的 !mp make (房間名稱, 指令)，依送出順序
+        self.making: Deque[Tuple[str, _PendingCommand]] = deque()
+        # 頻道名稱 -> 回覆的 pattern -> 等待這個回覆的指令 (依送出順序)
+        self.pending: Dict[str, Dict[Pattern[str], Deque[_PendingCommand]]] = {}
 
     async def __call__(self, ctx: Message) -> None:
-        for pattern in self.events:
-            if m := re.match(pattern, ctx.content):
-                asyncio.create_task(self.events[pattern](ctx.channel, **m.groupdict()))
+        if result := self.matcher.match(ctx.content):
+            pattern, handler, groups = result
+            started = perf_counter()
+            try:
+                await handler(ctx.channel, **groups)
+            finally:
+                self.client.metrics.observe_handler(
+                    handler.__qualname__, perf_counter() - started
+                )
+            # 狀態更新後才通知等待回覆的指令
+            if waiting := self.pending.get(ctx.channel.name):
+                self._resolve(ctx.channel.name, waiting, pattern, ctx.content, groups)
+
+    async def private(self, ctx: Message) -> None:
+        if result := self.private_matcher.match(ctx.content):
+            _, handler, groups = result
+            started = perf_counter()
+            try:
+                await handler(**groups)
+            finally:
+                self.client.metrics.observe_handler(
+                    handler.__qualname__, perf_counter() - started
+                )
+
+    def expect_make(self, name: str, command: str) -> "_PendingCommand":
+        """登記一個等待建立的房間，成功時 future 的結果是 MpChannel"""
+        pending = _PendingCommand(command, (MP_CREATED,), (MP_ERR_MAKE,))
+        self.making.append((name, pending))
+        return pending
+
+    def forget_make(self, pending: "_PendingCommand") -> None:
+        for item in self.making:
+            if item[1] is pending:
+                self.making.remove(item)
+                break
+
+    def expect(
+        self,
+        channel: "MpChannel",
+        command: str,
+        success: Tuple[Pattern[str], ...],
+        failures: Tuple[Pattern[str], ...] = (),
+    ) -> "_PendingCommand":
+        """
+        登記一個等待 BanchoBot 回覆的指令，要在送出指令前呼叫。
+        符合 success 時 future 的結果是 pattern 的 groupdict，
+        符合 failures 時丟出 MatchCommandError。
+        """
+        pending = _PendingCommand(command, success, failures)
+        waiting = self.pending.setdefault(channel.name, {})
+        for pattern in pending.patterns:
+            waiting.setdefault(pattern, deque()).append(pending)
+        return pending
+
+    def forget(self, channel: "MpChannel", pending: "_PendingCommand") -> None:
+        """移除已完成或逾時的指令"""
+        if (waiting := self.pending.get(channel.name)) is None:
+            return
+        for pattern in pending.patterns:
+            if (queue := waiting.get(pattern)) is not None:
+                try:
+                    queue.remove(pending)
+                except ValueError:
+                    pass
+                if not queue:
+                    del waiting[pattern]
+        if not waiting:
+            del self.pending[channel.name]
+
+    def _resolve(
+        self,
+        name: str,
+        waiting: Dict[Pattern[str], Deque["_PendingCommand"]],
+        pattern: Pattern[str],
+        content: str,
+        groups: dict,
+    ) -> None:
+        if (queue := waiting.get(pattern)) is None:
+            return
+        while queue:
+            pending = queue.popleft()
+            if pending.future.done():
+                continue  # 已經由其他 pattern 完成或逾時
+            if pending.patterns[pattern]:
+                pending.future.set_result(groups)
+            else:
+                pending.future.set_exception(
+                    MatchCommandError(pending.command, content)
+                )
+            break
+        if not queue:
+            del waiting[pattern]
+            if not waiting:
+                del self.pending[name]
 
     async def call_ext(self, event: MatchEventT, channel: "MpChannel", **kwargs):
-        # 擴充mp處理程序呼叫器
-        if handlers := self.ext_events.get(event):
-            Event = event(channel, **kwargs)
-            for handler in handlers:
-                asyncio.create_task(handler(Event))
+        # 擴充mp處理程序呼叫器，沒有人監聽時不建立事件
+        self.client.metrics.events[event.__name__] += 1
+        if listeners := self.listeners.candidates(event, channel.name):
+            await self._dispatch_ext(event(channel, **kwargs), listeners)
+
+    async def emit(self, event: BaseMatchEvent):
+        # 已經建立好的事件
+        self.client.metrics.events[type(event).__name__] += 1
+        if listeners := self.listeners.candidates(type(event), event.channel.name):
+            await self._dispatch_ext(event, listeners)
+
+    async def _dispatch_ext(self, event: BaseMatchEvent, listeners: List[Listener]):
+        name = type(event).__name__
+        metrics = self.client.metrics
+        for listener in listeners:
+            if listener.check is not None:
+                try:
+                    if not listener.check(event):
+                        continue
+                except Exception:
+                    log.exception("check %r 失敗", listener)
+                    continue
+            handler = listener.callback
+            if not listener.spawn:
+                # wait_for/stream: 在房間的處理順序中交付，不建立 task
+                await handler(event)
+                continue
+            self.client.dispatch(
+                metrics.track(name, handler.__qualname__, handler(event)),
+                name,
+                event.channel.name,
+                handler.__qualname__,
+                shed=False,
+            )
 
     # MP_LOCKED
     async def on_lock(self, channel: "MpChannel"):
@@ -243,19 +561,41 @@ class MultiplayerHandler:
             new=channel.locked,
         )
 
-    # async def on_make(self):
-    #     # !mp make 840
-    #     # !mp makeprivate 840
-    #     # success: Created the tournament match https://osu.ppy.sh/mp/98932732 840
-    #     # fail: You cannot create any more tournament matches. Please close any previous tournament matches you have open.
-    #     pass
+    # MP_CREATED (私訊)
+    async def on_make(self, mp_id: str, name: str):
+        # !mp make 840
+        # !mp makeprivate 840
+        # success: Created the tournament match https://osu.ppy.sh/mp/98932732 840
+        # 建立後伺服器會自動讓我們加入 #mp_98932732
+        channel = self.client.get_channel(f"#mp_{mp_id}")
+        channel.room_name = name
+        for item in self.making:
+            if item[0] == name:
+                self.making.remove(item)
+                if not item[1].future.done():
+                    item[1].future.set_result(channel)
+                break
+        await self.call_ext(
+            MatchCreated,
+            channel,
+        )
+
+    # MP_ERR_MAKE (私訊)
+    async def on_make_fail(self, reason: str):
+        # fail: You cannot create any more tournament matches. Please close any previous tournament matches you have open.
+        # 回覆中沒有房間名稱，交給最早送出的 !mp make
+        while self.making:
+            _, pending = self.making.popleft()
+            if not pending.future.done():
+                pending.future.set_exception(MatchCommandError(pending.command, reason))
+                break
 
     # MP_CHANGED_SIZE
     async def on_change_size(self, channel: "MpChannel", size: int):
         # !mp size 12
         # Changed match to size 12
         old = channel.size
-        channel.size = size
+        channel.size = int(size)
         await self.call_ext(
             MatchSizeChanged,
             channel,
@@ -280,37 +620,41 @@ class MultiplayerHandler:
                     old=old_size,
                     new=channel.size,
                 )
-            # 這個轉移給 !mp settings處理
-            # if team_mode := TeamMode._member_map_.get(s):
-            #     old_team_mode = channel.team_mode
-            #     channel.team_mode = team_mode
-            #     await self.call_ext(
-            #         MatchTeamModeChanged,
-            #         channel,
-            #         old=old_team_mode,
-            #         new=channel.team_mode,
-            #     )
-            # if score_mode := ScoreMode._member_map_.get(s):
-            #     old_score_mode = channel.score_mode
-            #     channel.score_mode = score_mode
-            #     await self.call_ext(
-            #         MatchScoreModeChanged,
-            #         channel,
-            #         old=old_score_mode,
-            #         new=channel.score_mode,
-            #     )
-        await channel.send("!mp settings")
+            elif (team_mode := TeamMode._member_map_.get(s)) is not None:
+                old_team_mode = channel.team_mode
+                if old_team_mode != team_mode:
+                    channel.team_mode = team_mode
+                    await self.call_ext(
+                        MatchTeamModeChanged,
+                        channel,
+                        old=old_team_mode,
+                        new=team_mode,
+                    )
+            elif (score_mode := ScoreMode._member_map_.get(s)) is not None:
+                old_score_mode = channel.score_mode
+                if old_score_mode != score_mode:
+                    channel.score_mode = score_mode
+                    await self.call_ext(
+                        MatchScoreModeChanged,
+                        channel,
+                        old=old_score_mode,
+                        new=score_mode,
+                    )
+        # 不在這裡等待回覆: 回覆也要經過同一個頻道的處理順序
+        await channel.request_refresh()
 
     # MP_PLAYER_MOVED
     async def on_move(self, channel: "MpChannel", username: str, new_slot: str):
         # _CHIMERA moved to slot 5
-        old_slot = channel.slots._username_slot[username]
         new_slot = int(new_slot)
-        channel.slots.move(username, new_slot)
+        old_slot = channel.slots.move(username, new_slot)
+        if old_slot is None:
+            # 不在表中(例如還沒 !mp settings)，至少記下現在的位置
+            channel.slots.set(new_slot, username)
         await self.call_ext(
             PlayerSlotChanged,
             channel,
-            username=username,
+            user=username,
             old=old_slot,
             new=new_slot,
         )
@@ -325,6 +669,7 @@ class MultiplayerHandler:
     async def on_change_host(self, channel: "MpChannel", host=None):
         old_host = channel.host
         channel.host = host
+        channel.slots.set_host(host)
         await self.call_ext(
             MatchHostChanged,
             channel,
@@ -332,13 +677,23 @@ class MultiplayerHandler:
             new=channel.host,
         )
 
+    # MP_HOST_SET
+    async def on_host_set(self, channel: "MpChannel", host: str):
+        # !mp host _CHIMERA
+        # Changed match host to _CHIMERA
+        # 之後通常還會有 _CHIMERA became the host.，已經是房主時不重複觸發
+        if channel.host != host:
+            await self.on_change_host(channel, host)
+
+    # MP_ERR_*
+    async def on_command_error(self, channel: "MpChannel"):
+        # 失敗的回覆只用來通知等待中的指令 (MpChannel.start 等)
+        pass
+
     # MP_CHANGED_NAME
-    # MP_UPDATE_NAME
     async def update_room_name(self, channel: "MpChannel", room_name: str):
         # !mp name 484
         # Room name updated to "484"
-        # !mp settings
-        # Room name: 840, History: https://osu.ppy.sh/mp/98933063
         old_room_name = channel.room_name
         channel.room_name = room_name
         await self.call_ext(
@@ -348,25 +703,17 @@ class MultiplayerHandler:
             new=channel.room_name,
         )
 
-    # MP_UPDATE_MAP
     # MP_CHANGED_MAP
     # MP_CHANGED_MAP2
     async def update_current_map(
         self, channel: "MpChannel", map_id: str, map_repl: str
     ):
-        # !mp settings
-        # Beatmap: https://osu.ppy.sh/b/3360065 Raimukun - Firmament star [Cup]
         # host change map
         # Beatmap changed to: Aitsuki Nakuru - phony [x] (https://osu.ppy.sh/b/3461204)
         # !mp map 3461204
         # Changed beatmap to https://osu.ppy.sh/b/96 Hinoi Team - Emoticons
         old_map = channel.current_map
-        channel.current_map = Beatmap(
-            id=int(map_id),
-            artist=map_repl.split(" - ")[0],
-            title=map_repl.split(" - ")[1].split(" [")[0],  # 有些地圖名稱會有 [xxx] 這種東西
-            version=map_repl.split(" [")[1].removesuffix("]"),
-        )
+        channel.current_map = _parse_beatmap(map_id, map_repl)
         await self.call_ext(
             MatchMapChanged,
             channel,
@@ -374,43 +721,50 @@ class MultiplayerHandler:
             new=channel.current_map,
         )
 
+    # !mp settings 的回覆會先收集起來，收到所有 Slot 行後一次套用:
+    # Room name: 840, History: https://osu.ppy.sh/mp/98933063
+    # Beatmap: https://osu.ppy.sh/b/3360065 Raimukun - Firmament star [Cup]
+    # Team mode: HeadToHead, Win condition: Score
+    # Active mods: Hidden, Freemod  (沒有 mod 時沒有這行)
+    # Players: 1
+    # Slot 1  Not Ready https://osu.ppy.sh/u/6008293 _CHIMERA        [Host / Team Blue / Hidden]
+
+    def _snapshot(self, channel: "MpChannel") -> "_SettingsSnapshot":
+        if (snapshot := self.settings.get(channel.name)) is None:
+            # 漏了 Room name 這行也照樣收集
+            snapshot = self.settings[channel.name] = _SettingsSnapshot()
+        return snapshot
+
+    # MP_UPDATE_NAME
+    async def on_settings_name(self, channel: "MpChannel", room_name: str):
+        snapshot = self.settings[channel.name] = _SettingsSnapshot()
+        snapshot.room_name = room_name
+
+    # MP_UPDATE_MAP
+    async def on_settings_map(self, channel: "MpChannel", map_id: str, map_repl: str):
+        self._snapshot(channel).current_map = _parse_beatmap(map_id, map_repl)
+
     # MP_UPDATE_SET
-    async def update_settings(
+    async def on_settings_mode(
         self, channel: "MpChannel", team_mode: str, score_mode: str
     ):
-        # !mp settings
-        # Team mode: HeadToHead, Win condition: Score
-        old_team_mode = channel.team_mode
-        channel.team_mode = TeamMode[team_mode]
-        await self.call_ext(
-            MatchTeamModeChanged,
-            channel,
-            old=old_team_mode,
-            new=channel.team_mode,
-        )
+        snapshot = self._snapshot(channel)
+        snapshot.team_mode = TeamMode[team_mode]
+        snapshot.score_mode = ScoreMode[score_mode]
 
-        old_score_mode = channel.score_mode
-        channel.score_mode = ScoreMode[score_mode]
-        await self.call_ext(
-            MatchScoreModeChanged,
-            channel,
-            old=old_score_mode,
-            new=channel.score_mode,
-        )
+    # MP_UPDATE_MODS
+    async def on_settings_mods(self, channel: "MpChannel", mods: str):
+        snapshot = self._snapshot(channel)
+        names = mods.split(", ")
+        snapshot.freemod = "Freemod" in names
+        snapshot.active_mods = Mods.from_str(*(n for n in names if n != "Freemod"))
 
     # MP_UPDATE_PC
-    async def update_player_count(self, channel: "MpChannel", player_count: str):
-        # !mp settings
-        # Players: 1
-        old_player_count = channel.player_count
-        channel.player_count = int(player_count)
-        channel.slots.clear()
-        await self.call_ext(
-            MatchPlayerCountChanged,
-            channel,
-            old=old_player_count,
-            new=channel.player_count,
-        )
+    async def on_settings_players(self, channel: "MpChannel", player_count: str):
+        snapshot = self._snapshot(channel)
+        snapshot.player_count = int(player_count)
+        if not snapshot.player_count:
+            await self.apply_settings(channel)
 
     # MP_SLOT_INFO
     async def update_palyer(
@@ -422,20 +776,19 @@ class MultiplayerHandler:
         user_name: str,
         flags: str,
     ):
-        # !mp settings
         # Slot 1  Not Ready https://osu.ppy.sh/u/6008293 _CHIMERA        [Host / Team Blue / Hidden]
         #         No Map
         #         Ready
+        if (snapshot := self.settings.get(channel.name)) is None:
+            log.debug("SLOT_WITHOUT_SETTINGS: channel=%r slot=%r", channel, slot)
+            return
 
-        # 初始化
-        channel.host = None
         is_host = False
         team = TeamType.Neutral
         enabled_mods = Mods.NoMod
 
-        for flag in flags.strip()[1:-1].split(" / "):
+        for flag in flags[1:-1].split(" / ") if flags else ():
             if flag == "Host":
-                channel.host = user_name
                 is_host = True
             elif flag == "Team Blue":
                 team = TeamType.Blue
@@ -444,26 +797,74 @@ class MultiplayerHandler:
             else:
                 enabled_mods = Mods.from_str(*flag.split(", "))
 
-        channel.slots.set(
-            slot_number=int(slot),
-            username=user_name,
-            user_id=user_id,
-            status=status,
-            is_host=is_host,
-            team=team,
-            enabled_mods=enabled_mods,
+        user_id = int(user_id)
+        self.client.resolver.feed(user_name, user_id)
+        snapshot.slots.append(
+            (int(slot), user_name, user_id, status, is_host, team, enabled_mods)
         )
-        await self.call_ext(
-            SlotUpdated,
+        if (
+            snapshot.player_count is not None
+            and len(snapshot.slots) >= snapshot.player_count
+        ):
+            await self.apply_settings(channel)
+
+    async def apply_settings(self, channel: "MpChannel"):
+        """把收集好的 !mp settings 一次套用到房間，並觸發一個 MatchSettingsUpdated"""
+        snapshot = self.settings.pop(channel.name)
+        slots = channel.slots
+        changes = {}
+
+        def update(field: str, value: Any):
+            old = getattr(channel, field)
+            if old != value:
+                setattr(channel, field, value)
+                changes[field] = (old, value)
+
+        for field in (
+            "room_name",
+            "current_map",
+            "team_mode",
+            "score_mode",
+        ):
+            if (value := getattr(snapshot, field)) is not None:
+                update(field, value)
+        update("active_mods", snapshot.active_mods)
+        update("freemod", snapshot.freemod)
+        update("player_count", snapshot.player_count)
+
+        before = {slot.username: _slot_state(n, slot) for n, slot in slots.items()}
+        host = None
+        slots.mark_stale()
+        for number, username, user_id, status, is_host, team, mods in snapshot.slots:
+            slots.set(number, username, user_id, status, is_host, team, mods)
+            if is_host:
+                host = username
+        slots.prune()
+        update("host", host)
+        after = {slot.username: _slot_state(n, slot) for n, slot in slots.items()}
+
+        event = MatchSettingsUpdated(
             channel,
-            slot_number=int(slot),
-            username=user_name,
-            user_id=user_id,
-            status=status,
-            is_host=is_host,
-            team=team,
-            enabled_mods=enabled_mods,
+            changes=changes,
+            joined=tuple(name for name in after if name not in before),
+            left=tuple(name for name in before if name not in after),
+            updated=tuple(
+                name
+                for name, state in after.items()
+                if name in before and before[name] != state
+            ),
         )
+        channel._settings_applied(event)
+        await self.emit(event)
+        # 個別的變更事件，給只關心隊伍/計分模式的訂閱
+        if (change := changes.get("team_mode")) is not None:
+            await self.call_ext(
+                MatchTeamModeChanged, channel, old=change[0], new=change[1]
+            )
+        if (change := changes.get("score_mode")) is not None:
+            await self.call_ext(
+                MatchScoreModeChanged, channel, old=change[0], new=change[1]
+            )
 
     # MP_STARTED
     async def on_start(self, channel: "MpChannel"):
@@ -493,15 +894,14 @@ class MultiplayerHandler:
     # MP_CHANGED_TEAM
     async def on_change_team(self, channel: "MpChannel", user: str, team: str):
         # _CHIMERA changed to Red
-        user = channel.slots.get(user)
-        old_team = user.team
-        user.team = TeamType[team]
+        new_team = TeamType[team]
+        old_team = channel.slots.set_team(user, new_team)
         await self.call_ext(
             PlayerTeamChanged,
             channel,
             user=user,
             old=old_team,
-            new=user.team,
+            new=new_team,
         )
 
     # MP_CHANGED_MODE
@@ -523,15 +923,17 @@ class MultiplayerHandler:
         # no params: Disabled all mods, disabled FreeMod
         # has params: Enabled NoFail, disabled FreeMod
         # freemod: Disabled all mods, enabled FreeMod
-        old_enabled_mods = channel.enabled_mods
+        old_enabled_mods = channel.active_mods
         old_freemod = channel.freemod
-        channel.active_mods = Mods.from_str(*enabled_mods.split(", "))
+        channel.active_mods = (
+            Mods.from_str(*enabled_mods.split(", ")) if enabled_mods else Mods.NoMod
+        )
         channel.freemod = freemod == "en"
         await self.call_ext(
             MatchModsChanged,
             channel,
-            old_enabled_mods=old_enabled_mods,
-            new_enabled_mods=channel.active_mods,
+            old_mods=old_enabled_mods,
+            new_mods=channel.active_mods,
             old_freemod=old_freemod,
             new_freemod=channel.freemod,
         )
@@ -560,7 +962,7 @@ class MultiplayerHandler:
     # MP_REMOVED_REF
     async def on_removeref(self, channel: "MpChannel", ref: str):
         # Removed _CHIMERA from the match referees
-        channel.refs.remove(ref)
+        channel.refs.discard(ref)
         await self.call_ext(
             MatchRefereeRemoved,
             channel,
@@ -576,6 +978,7 @@ class MultiplayerHandler:
     # MP_KICKED
     async def on_kick(self, channel: "MpChannel", user: str):
         # Kicked _CHIMERA from the match
+        channel.slots.remove_from_username(user)
         await self.call_ext(
             PlayerKicked,
             channel,
@@ -583,12 +986,12 @@ class MultiplayerHandler:
         )
 
     # MP_TIMER_START
-    async def on_timer(self, channel: "MpChannel", time: str):
+    async def on_timer(self, channel: "MpChannel", time: str, unit: str):
         # Countdown ends in ?? minutes/seconds
         await self.call_ext(
             MatchTimerStarted,
             channel,
-            time=int(time),
+            time=int(time) * (60 if unit == "minute" else 1),
         )
 
     # MP_TIMER_ABORT
@@ -615,6 +1018,9 @@ class MultiplayerHandler:
             MatchClosed,
             channel,
         )
+        # 房間已經不存在，只限這個房間的訂閱不會再被觸發
+        self.listeners.discard_channel(channel.name)
+        self.settings.pop(channel.name, None)
 
     # MP_JOIN
     async def on_join(
@@ -622,7 +1028,7 @@ class MultiplayerHandler:
     ):
         # _CHIMERA joined in slot 1.
         # _CHIMERA joined in slot 1 for team blue/red.
-        channel.slots.set(int(slot), user, TeamType(team))
+        channel.slots.set(int(slot), user, team=TeamType(team))
         await self.call_ext(
             PlayerJoined,
             channel,
@@ -647,6 +1053,7 @@ class MultiplayerHandler:
     # MP_ALL_READY
     async def on_ready(self, channel: "MpChannel"):
         # All players are ready
+        channel.slots.set_status_all("Ready")
         await self.call_ext(
             AllPlayerReady,
             channel,
@@ -668,6 +1075,7 @@ class MultiplayerHandler:
     async def on_finished(self, channel: "MpChannel"):
         # The match has finished!
         channel.started = False
+        channel.slots.set_status_all("Not Ready")
         await self.call_ext(
             MatchFinished,
             channel,
@@ -0,0 +1,259 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from .utils.errors import NotInChannel
+from .utils.events import BaseMatchEvent
+
+Check = Callable[[BaseMatchEvent], bool]
+Key = Tuple[type, Optional[str]]
+
+
+class Listener:
+    """
+    一個訂閱，channel 為 None 表示所有房間。
+
+    `spawn` 為 True 時回呼在背景執行 (`mp_listen`)；False 時在房間的處理順序中
+    直接 await 回呼 (`wait_for`、`stream`)，不會建立 task。
+    `on_discard` 在房間關閉、訂閱被一起移除時呼叫。
+    """
+
+    __slots__ = ("event", "channel", "check", "callback", "spawn", "on_discard")
+
+    def __init__(
+        self,
+        event: Type[BaseMatchEvent],
+        callback: Callable[[BaseMatchEvent], Any],
+        channel: Optional[str] = None,
+        check: Optional[Check] = None,
+        *,
+        spawn: bool = True,
+        on_discard: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.event: Type[BaseMatchEvent] = event
+        self.callback: Callable[[BaseMatchEvent], Any] = callback
+        self.channel: Optional[str] = channel
+        self.check: Optional[Check] = check
+        self.spawn: bool = spawn
+        self.on_discard: Optional[Callable[[], None]] = on_discard
+
+    @property
+    def key(self) -> Key:
+        return self.event, self.channel
+
+    def __repr__(self) -> str:
+        return (
+            f"<Listener {self.event.__name__} {self.channel or '*'} "
+            f"{getattr(self.callback, '__qualname__', self.callback)}>"
+        )
+
+
+class ListenerIndex:
+    """
+    以 (事件類別, 頻道名稱) 建立索引的訂閱表。
+
+    一個事件只會查到訂閱了它 (或它的父類別) 且頻道符合的 Listener，
+    不需要叫醒其他房間的回呼。事件類別的父類別在第一次出現時解析並快取。
+    `check` 在查詢時以事件呼叫，應該是很快的判斷。
+    """
+
+    __slots__ = ("_listeners", "_channels", "_mro")
+
+    def __init__(self) -> None:
+        self._listeners: Dict[Key, List[Listener]] = {}
+        self._channels: Dict[str, Set[Key]] = {}  # 頻道名稱 -> 有訂閱的 key
+        self._mro: Dict[type, Tuple[type, ...]] = {}
+
+    def add(self, listener: Listener) -> Listener:
+        self._listeners.setdefault(listener.key, []).append(listener)
+        if listener.channel is not None:
+            self._channels.setdefault(listener.channel, set()).add(listener.key)
+        return listener
+
+    def remove(self, listener: Listener) -> bool:
+        key = listener.key
+        if (listeners := self._listeners.get(key)) is None:
+            return False
+        try:
+            listeners.remove(listener)
+        except ValueError:
+            return False
+        if not listeners:
+            del self._listeners[key]
+            if (keys := self._channels.get(listener.channel)) is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._channels[listener.channel]
+        return True
+
+    def discard_channel(self, channel: str) -> int:
+        """移除某個房間的所有訂閱 (房間關閉或離開頻道時)，回傳移除的數量"""
+        removed = 0
+        for key in self._channels.pop(channel, ()):
+            for listener in self._listeners.pop(key, ()):
+                removed += 1
+                if listener.on_discard is not None:
+                    listener.on_discard()
+        return removed
+
+    def resolve(self, event: Type[BaseMatchEvent]) -> Tuple[type, ...]:
+        """事件類別本身與所有屬於 BaseMatchEvent 的父類別"""
+        if (classes := self._mro.get(event)) is None:
+            classes = self._mro[event] = tuple(
+                cls for cls in event.__mro__ if issubclass(cls, BaseMatchEvent)
+            )
+        return classes
+
+    def candidates(self, event: Type[BaseMatchEvent], channel: str) -> List[Listener]:
+        """類別與頻道符合的 Listener (還沒有檢查 check)"""
+        result = []
+        listeners = self._listeners
+        for cls in self.resolve(event):
+            if found := listeners.get((cls, None)):
+                result.extend(found)
+            if found := listeners.get((cls, channel)):
+                result.extend(found)
+        return result
+
+    def __len__(self) -> int:
+        return sum(map(len, self._listeners.values()))
+
+
+class EventStream:
+    """
+    `IrcClient.stream()` 回傳的事件串流，最多保留 `maxsize` 個還沒讀取的事件。
+
+    - `policy="drop"`: 滿了丟棄最舊的事件，丟棄的數量記在 `dropped`
+    - `policy="block"`: 滿了讓該房間的處理等待，直到事件被讀取 (背壓)；
+      最多等待 `block_timeout` 秒，之後改為丟棄最舊的事件並記在 `dropped`
+
+    等待期間同一個房間的其他訊息 (包含指令的回覆) 都不會被處理，房間的處理佇列滿了
+    還會讓整個連線停止讀取。所以 block 的串流不要在 `async for` 中 await 同一個房間的
+    指令 (例如 `channel.start()`)，指令回覆要等到 `block_timeout` 後才會被處理。
+
+    用 `async with` 或 `close()` 取消訂閱；房間關閉時串流在讀完剩下的事件後結束。
+    """
+
+    __slots__ = (
+        "policy",
+        "block_timeout",
+        "dropped",
+        "_index",
+        "_listener",
+        "_queue",
+        "_space",
+        "_closed",
+    )
+
+    def __init__(
+        self,
+        index: ListenerIndex,
+        event: Type[BaseMatchEvent],
+        channel: Optional[str] = None,
+        check: Optional[Check] = None,
+        *,
+        maxsize: int = 100,
+        policy: str = "drop",
+        block_timeout: float = 5.0,
+    ) -> None:
+        if policy not in ("drop", "block"):
+            raise ValueError("policy 只支援 'drop'、'block'")
+        if maxsize < 1:
+            raise ValueError("maxsize 至少為 1")
+        self.policy: str = policy
+        self.block_timeout: float = block_timeout
+        self.dropped: int = 0
+        self._index: ListenerIndex = index
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._space = asyncio.Event()  # block: 讀取後通知等待中的房間
+        self._closed: bool = False
+        self._listener: Listener = index.add(
+            Listener(
+                event,
+                self._put,
+                channel,
+                check,
+                spawn=False,
+                on_discard=self._discarded,
+            )
+        )
+
+    async def _put(self, event: BaseMatchEvent) -> None:
+        if self._closed:
+            return
+        queue = self._queue
+        if queue.full() and self.policy == "block":
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.block_timeout
+            while queue.full() and not self._closed:
+                if (remaining := deadline - loop.time()) <= 0:
+                    break
+                self._space.clear()
+                try:
+                    await asyncio.wait_for(self._space.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if self._closed:
+                return
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(event)
+
+    def _discarded(self) -> None:
+        self._closed = True
+        self._space.set()  # 關閉後不再讓房間等待
+        if self._queue.empty():
+            self._queue.put_nowait(None)  # 叫醒等待中的讀取
+
+    def close(self) -> None:
+        if not self._closed:
+            self._index.remove(self._listener)
+            self._discarded()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __aiter__(self) -> "EventStream":
+        return self
+
+    async def __anext__(self) -> BaseMatchEvent:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        if (event := await self._queue.get()) is None:
+            raise StopAsyncIteration
+        self._space.set()
+        return event
+
+    async def __aenter__(self) -> "EventStream":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        self.close()
+
+
+async def wait_for(
+    index: ListenerIndex,
+    event: Type[BaseMatchEvent],
+    channel: Optional[str] = None,
+    check: Optional[Check] = None,
+    timeout: Optional[float] = None,
+) -> BaseMatchEvent:
+    """等待下一個符合的事件，房間在等待中關閉時丟出 NotInChannel"""
+    future = asyncio.get_running_loop().create_future()
+
+    async def deliver(matched: BaseMatchEvent) -> None:
+        if not future.done():
+            future.set_result(matched)
+
+    def discarded() -> None:
+        if not future.done():
+            future.set_exception(NotInChannel(f"等待 {event.__name__} 時房間已關閉"))
+
+    listener = index.add(
+        Listener(event, deliver, channel, check, spawn=False, on_discard=discarded)
+    )
+    try:
+        return await asyncio.wait_for(future, timeout)
+    finally:
+        index.remove(listener)
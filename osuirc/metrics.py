@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    from .client import IrcClient
+
+log = logging.getLogger("IrcClient")
+
+# 秒
+BUCKETS: Tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """固定區間的延遲分佈，`observe` 只做一次二分搜尋"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets: Tuple[float, ...] = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)  # 最後一格是 +Inf
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """估計值，回傳所在區間的上限"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, n in zip((*self.buckets, "+Inf"), self.counts):
+            total += n
+            result.append((str(bound), total))
+        return result
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    client 內建的統計。
+
+    - `lines`: 每種 command/數字代碼收到的行數
+    - `events`: 每種 BanchoBot 事件 (`BaseMatchEvent` 子類別) 的次數
+    - `handlers`: `IrcHandler`/`MultiplayerHandler` 每個處理程序的執行時間
+    - `callbacks`: 每個 `mp_listen` 回呼從開始到結束的時間，以 (事件, 回呼) 區分
+    - `send_wait`: 訊息從放進傳送佇列到實際送出的時間
+
+    佇列深度、傳送限制的等待次數等則在 `snapshot()` 時才向各元件讀取。
+
+    ```PY
+    bot.metrics.snapshot()                   # dict
+    bot.metrics.prometheus()                 # Prometheus 文字格式
+    await bot.metrics.serve(port=9100)       # GET /metrics
+    ```
+    """
+
+    def __init__(self, client: "IrcClient") -> None:
+        self.client: "IrcClient" = client
+        self.started: float = time.time()
+        self.lines: Counter = Counter()
+        self.events: Counter = Counter()
+        self.handlers: Dict[str, Histogram] = defaultdict(Histogram)
+        self.callbacks: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.send_wait: Histogram = Histogram()
+
+    def observe_handler(self, name: str, seconds: float) -> None:
+        self.handlers[name].observe(seconds)
+
+    async def track(self, event: str, name: str, coro: Coroutine) -> Any:
+        """執行回呼並記錄花費的時間"""
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.callbacks[event, name].observe(time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """目前所有統計的 dict"""
+        client = self.client
+        return {
+            "uptime": time.time() - self.started,
+            "lines": dict(self.lines),
+            "events": dict(self.events),
+            "handlers": {k: h.to_dict() for k, h in self.handlers.items()},
+            "callbacks": {
+                f"{e}:{n}": h.to_dict() for (e, n), h in self.callbacks.items()
+            },
+            "send_queue": {
+                "depth": client.sendmsg_queue.stats(),
+                "wait": self.send_wait.to_dict(),
+            },
+            "rate_limiter": client.rate_limiter.stats(),
+            "scheduler": client.scheduler.stats(),
+            "writer": client.writer.stats() if client.writer is not None else None,
+            "watchdog": (
+                client.watchdog.stats() if client.watchdog is not None else None
+            ),
+        }
+
+    def families(self) -> List[Tuple[str, str, str, List[Tuple[dict, Any]]]]:
+        """(名稱, 類型, 說明, [(標籤, 值或 Histogram)])"""
+        client = self.client
+        base = {"client": client.nickname}
+        limiter = client.rate_limiter
+        scheduler = client.scheduler.stats()
+
+        families = [
+            (
+                "osuirc_lines_received_total",
+                "counter",
+                "Lines received by IRC command",
+                [({**base, "command": k}, v) for k, v in self.lines.items()],
+            ),
+            (
+                "osuirc_match_events_total",
+                "counter",
+                "BanchoBot match events",
+                [({**base, "event": k}, v) for k, v in self.events.items()],
+            ),
+            (
+                "osuirc_handler_seconds",
+                "histogram",
+                "Handler run time",
+                [({**base, "handler": k}, h) for k, h in self.handlers.items()],
+            ),
+            (
+                "osuirc_callback_seconds",
+                "histogram",
+                "mp_listen callback run time",
+                [
+                    ({**base, "event": e, "callback": n}, h)
+                    for (e, n), h in self.callbacks.items()
+                ],
+            ),
+            (
+                "osuirc_send_wait_seconds",
+                "histogram",
+                "Time from send() to the wire",
+                [(base, self.send_wait)],
+            ),
+            (
+                "osuirc_send_queue_depth",
+                "gauge",
+                "Queued outbound messages",
+                [
+                    ({**base, "priority": k}, v)
+                    for k, v in client.sendmsg_queue.stats().items()
+                ],
+            ),
+            (
+                "osuirc_ratelimit_stalls_total",
+                "counter",
+                "Sends delayed by the rate limiter",
+                [(base, limiter.stalls)],
+            ),
+            (
+                "osuirc_ratelimit_stalled_seconds_total",
+                "counter",
+                "Time spent waiting for the rate limiter",
+                [(base, limiter.stalled)],
+            ),
+            (
+                "osuirc_scheduler_queued",
+                "gauge",
+                "Lines waiting in channel queues",
+                [(base, scheduler["queued"])],
+            ),
+            (
+                "osuirc_scheduler_tasks",
+                "gauge",
+                "Running background tasks",
+                [(base, scheduler["tasks"])],
+            ),
+            (
+                "osuirc_scheduler_shed_total",
+                "counter",
+                "Callbacks dropped because the background task limit was reached",
+                [(base, scheduler["shed"])],
+            ),
+        ]
+        if (watchdog := client.watchdog) is not None:
+            families.append(
+                (
+                    "osuirc_loop_lag_seconds",
+                    "histogram",
+                    "Event loop lag sampled by the watchdog",
+                    [(base, watchdog.lag)],
+                )
+            )
+        return families
+
+    def prometheus(self) -> str:
+        return render([self])
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = 9100
+    ) -> asyncio.AbstractServer:
+        return await serve([self], host, port)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render(sources: Iterable[Metrics]) -> str:
+    """把多個 client 的統計合併成 Prometheus 文字格式"""
+    merged: Dict[str, Tuple[str, str, list]] = {}
+    for metrics in sources:
+        for name, kind, help, samples in metrics.families():
+            if name in merged:
+                merged[name][2].extend(samples)
+            else:
+                merged[name] = (kind, help, list(samples))
+
+    out = []
+    for name, (kind, help, samples) in merged.items():
+        out.append(f"# HELP {name} {help}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if isinstance(value, Histogram):
+                for bound, total in value.cumulative():
+                    out.append(
+                        f"{name}_bucket{_labels({**labels, 'le': bound})} {total}"
+                    )
+                out.append(f"{name}_sum{_labels(labels)} {value.sum}")
+                out.append(f"{name}_count{_labels(labels)} {value.count}")
+            else:
+                out.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(out) + "\n"
+
+
+async def serve(
+    sources: Iterable[Metrics], host: str = "127.0.0.1", port: int = 9100
+) -> asyncio.AbstractServer:
+    """只回應 `GET /metrics` 的 HTTP 伺服器"""
+    sources = list(sources)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            method, path, *_ = request.decode("latin-1").split() or ("", "")
+            if method == "GET" and path.split("?")[0] == "/metrics":
+                status, body = "200 OK", render(sources).encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    log.info(
+        "metrics on http://%s:%s/metrics", host, server.sockets[0].getsockname()[1]
+    )
+    return server
@@ -1,16 +1,45 @@
-from typing import TYPE_CHECKING, Set
+import asyncio
+from typing import TYPE_CHECKING, Dict, Optional, Pattern, Set, Tuple
 
 from osuirc.objects.osu import Beatmap
 
-from .enums import Mods, ScoreMode, TeamMode
+from .enums import Mods, Priority, ScoreMode, TeamMode, TeamType
 from ..objects.slot import Slots
 from ..utils.errors import NotInChannel
+from ..utils.regex import (
+    MP_ABORTED,
+    MP_ADDED_REF,
+    MP_CHANGED_MAP2,
+    MP_CHANGED_MODS,
+    MP_CHANGED_PASSWD,
+    MP_CHANGED_SET,
+    MP_CHANGED_SIZE,
+    MP_ERR_MAP,
+    MP_ERR_NOT_STARTED,
+    MP_ERR_SETTINGS,
+    MP_ERR_SIZE,
+    MP_ERR_STARTED,
+    MP_ERR_USER,
+    MP_HOST_SET,
+    MP_STARTED,
+)
 
 if TYPE_CHECKING:
     from ..client import IrcClient
+    from ..utils.events import MatchSettingsUpdated
 
 
 class Channel(object):
+    __slots__ = (
+        "name",
+        "__client",
+        "joined",
+        "topic",
+        "created_time",
+        "users",
+        "__weakref__",
+    )
+
     def __init__(self, client: "IrcClient", name: str) -> None:
         self.name: str = name
         self.__client: "IrcClient" = client
@@ -27,18 +56,31 @@ class Channel(object):
     def __str__(self) -> str:
         return self.name
 
+    @property
+    def client(self) -> "IrcClient":
+        return self.__client
+
     @property
     def is_mutiplayer(self):
         return self.name[:4] == "#mp_"
 
     async def send(
-        self, content: str, *, action: bool = False, ignore_limit: bool = False
+        self,
+        content: str,
+        *,
+        action: bool = False,
+        ignore_limit: bool = False,
+        priority: Priority = None,
     ) -> None:
         if not self.joined:
             raise NotInChannel(f"無法將訊息傳送到'{self.name}'，因為你已離開頻道。")
 
         await self.__client.send(
-            self.name, content, action=action, ignore_limit=ignore_limit
+            self.name,
+            content,
+            action=action,
+            ignore_limit=ignore_limit,
+            priority=priority,
         )
 
     async def part(self) -> None:
@@ -46,6 +88,27 @@ class Channel(object):
 
 
 class MpChannel(Channel):
+    __slots__ = (
+        "_mp_id",
+        "game_id",
+        "room_name",
+        "has_password",
+        "size",
+        "slots",
+        "score_mode",
+        "team_mode",
+        "game_mode",
+        "active_mods",
+        "freemod",
+        "current_map",
+        "host",
+        "started",
+        "locked",
+        "player_count",
+        "refs",
+        "_refreshing",
+    )
+
     def __init__(self, client: "IrcClient", name: str) -> None:
         super().__init__(client, name)
         self._mp_id: int = int(self.name[4:])
@@ -64,8 +127,171 @@ class MpChannel(Channel):
         self.started: bool = False
         self.locked: bool = False
         self.player_count: int = 0
-        self.refs: set = {}
+        self.refs: Set[str] = set()
+        # 已送出、還沒收到完整回覆的 !mp settings
+        self._refreshing: Optional[asyncio.Future] = None
 
     @property
     def mp_id(self):
         return self._mp_id
+
+    # 房間統計，由 slots 在每次變動時維護
+
+    @property
+    def ready_count(self) -> int:
+        return self.slots.count("Ready")
+
+    @property
+    def common_mods(self) -> Mods:
+        return self.slots.common_mods
+
+    def all_ready(self) -> bool:
+        """所有玩家都已準備"""
+        return self.slots.all_ready()
+
+    def all_have(self, mods: Mods) -> bool:
+        """所有玩家都開著 mods，例如 `all_have(Mods.NoFail)`"""
+        return self.slots.all_have(mods)
+
+    def team_balance(self) -> int:
+        """藍隊人數減紅隊人數，0 表示人數相同"""
+        return self.slots.team_size(TeamType.Blue) - self.slots.team_size(TeamType.Red)
+
+    # !mp settings
+
+    async def request_refresh(
+        self, *, priority: Priority = None, stale_after: float = 10.0
+    ) -> asyncio.Future:
+        """
+        要求更新房間狀態但不等待，回傳完成時會得到 `MatchSettingsUpdated` 的 Future。
+        已經有送出但還沒回覆的 !mp settings 時不會重複送出。
+        `stale_after` 秒後還沒回覆就視為遺失，下一次要求會重新送出。
+        """
+        if (future := self._refreshing) is not None and not future.done():
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = self._refreshing = loop.create_future()
+        loop.call_later(stale_after, self._refresh_expired, future)
+        await self.send("!mp settings", priority=priority)
+        return future
+
+    async def refresh(
+        self, timeout: float = 10.0, *, priority: Priority = None
+    ) -> "MatchSettingsUpdated":
+        """
+        送出 !mp settings 並等待整份回覆套用完成。
+        同時呼叫的多個 `refresh()` 共用同一個 !mp settings。
+
+        ```PY
+        update = await channel.refresh()
+        if channel.all_ready():
+            await channel.send("!mp start 5")
+        ```
+        """
+        future = await self.request_refresh(priority=priority, stale_after=timeout)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def _refresh_expired(self, future: asyncio.Future) -> None:
+        if self._refreshing is future:
+            self._refreshing = None
+
+    def _settings_applied(self, event: "MatchSettingsUpdated") -> None:
+        # 由 MultiplayerHandler 在套用完整份回覆後呼叫
+        future, self._refreshing = self._refreshing, None
+        if future is not None and not future.done():
+            future.set_result(event)
+
+    # 等待 BanchoBot 回覆的 !mp 指令，失敗時丟出 MatchCommandError，
+    # 沒有回覆時丟出 asyncio.TimeoutError
+
+    async def command(
+        self,
+        command: str,
+        success: Tuple[Pattern[str], ...],
+        failures: Tuple[Pattern[str], ...] = (),
+        timeout: float = 10.0,
+    ) -> Dict[str, str]:
+        """
+        送出指令並等待符合 success 的回覆，回傳 pattern 的 groupdict。
+        回傳時房間狀態已經由 MultiplayerHandler 更新。
+        """
+        handler = self.client.mphandler
+        pending = handler.expect(self, command, success, failures)
+        try:
+            await self.send(command)
+            return await asyncio.wait_for(pending.future, timeout)
+        finally:
+            handler.forget(self, pending)
+
+    async def start(self, delay: int = 0, timeout: float = 10.0) -> None:
+        """!mp start，等到遊戲真的開始 (倒數結束) 才回傳"""
+        await self.command(
+            f"!mp start {delay}" if delay else "!mp start",
+            (MP_STARTED,),
+            (MP_ERR_STARTED,),
+            timeout=delay + timeout,
+        )
+
+    async def abort(self, timeout: float = 10.0) -> None:
+        await self.command("!mp abort", (MP_ABORTED,), (MP_ERR_NOT_STARTED,), timeout)
+
+    async def change_map(
+        self, map_id: int, game_mode: int = None, timeout: float = 10.0
+    ) -> Beatmap:
+        command = f"!mp map {map_id}"
+        if game_mode is not None:
+            command += f" {int(game_mode)}"
+        await self.command(command, (MP_CHANGED_MAP2,), (MP_ERR_MAP,), timeout)
+        return self.current_map
+
+    async def change_mods(
+        self, mods: Mods = Mods.NoMod, freemod: bool = False, timeout: float = 10.0
+    ) -> Tuple[Mods, bool]:
+        """回傳 (active_mods, freemod)"""
+        command = f"!mp mods {int(mods)}"
+        if freemod:
+            command += " Freemod"
+        await self.command(command, (MP_CHANGED_MODS,), timeout=timeout)
+        return self.active_mods, self.freemod
+
+    async def change_size(self, size: int, timeout: float = 10.0) -> int:
+        await self.command(
+            f"!mp size {size}", (MP_CHANGED_SIZE,), (MP_ERR_SIZE,), timeout
+        )
+        return self.size
+
+    async def change_host(self, username: str, timeout: float = 10.0) -> str:
+        await self.command(
+            f"!mp host {username}", (MP_HOST_SET,), (MP_ERR_USER,), timeout
+        )
+        return self.host
+
+    async def change_settings(
+        self,
+        team_mode: TeamMode,
+        score_mode: ScoreMode = None,
+        size: int = None,
+        timeout: float = 10.0,
+    ) -> None:
+        """!mp set，隊伍與計分模式要等 !mp settings 的回覆才會更新，所以會一起等待"""
+        command = f"!mp set {team_mode.value}"
+        if score_mode is None and size is not None:
+            score_mode = self.score_mode  # 指定 size 時 score_mode 不能省略
+        if score_mode is not None:
+            command += f" {score_mode.value}"
+        if size is not None:
+            command += f" {size}"
+        await self.command(command, (MP_CHANGED_SET,), (MP_ERR_SETTINGS,), timeout)
+        await self.refresh(timeout)
+
+    async def change_password(self, password: str = "", timeout: float = 10.0) -> None:
+        """空字串表示移除密碼"""
+        await self.command(
+            f"!mp password {password}".rstrip(), (MP_CHANGED_PASSWD,), timeout=timeout
+        )
+
+    async def add_ref(self, username: str, timeout: float = 10.0) -> None:
+        await self.command(
+            f"!mp addref {username}", (MP_ADDED_REF,), (MP_ERR_USER,), timeout
+        )
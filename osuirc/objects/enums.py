@@ -86,6 +86,12 @@ class Mods(IntFlag):
                 if isinstance(m, str):
                     result |= cls._member_map_[m]
             except KeyError:
-                logging.warning(f"{m} not in enum Mods")
+                logging.warning("%s not in enum Mods", m)
                 continue
         return result
+
+
+class Priority(IntEnum):
+    Critical = 0  # !mp 指令
+    Normal = 1
+    Bulk = 2
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING, Union
 
+from ..objects.enums import Priority
 from ..objects.user import User
 
 if TYPE_CHECKING:
@@ -8,6 +9,15 @@ if TYPE_CHECKING:
 
 
 class Message(object):
+    __slots__ = (
+        "__client",
+        "__author",
+        "__target",
+        "__content",
+        "__channel",
+        "__private",
+    )
+
     def __init__(
         self, client: "IrcClient", author: User, target: str, content: str
     ) -> None:
@@ -36,12 +46,21 @@ class Message(object):
         return self.__private
 
     async def reply(
-        self, content: str, *, action: bool = False, ignore_limit: bool = False
+        self,
+        content: str,
+        *,
+        action: bool = False,
+        ignore_limit: bool = False,
+        priority: Priority = None,
     ):
         """
         快速回復，如果發送者(sender)是在頻道上發言，則會回覆在頻道；發送者(sender)是用私人訊息，則會回覆給發送者
         """
         target = self.author.username if self.is_private else self.channel.name
         await self.__client.send(
-            target, content, action=action, ignore_limit=ignore_limit
+            target,
+            content,
+            action=action,
+            ignore_limit=ignore_limit,
+            priority=priority,
         )
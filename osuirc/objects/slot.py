@@ -1,9 +1,22 @@
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from osuirc.objects.enums import Mods, TeamType
 
+SLOT_COUNT = 16
+MOD_BITS = 31
+
 
 class Slot(object):
+    __slots__ = (
+        "username",
+        "user_id",
+        "status",
+        "is_host",
+        "team",
+        "enabled_mods",
+        "need_update",
+    )
+
     def __init__(
         self,
         username: str,
@@ -23,19 +36,78 @@ class Slot(object):
 
 
 class Slots(object):
-    _slots: Dict[int, Slot] = {}  # 位置
-    _username_slot: Dict[str, int] = {}  # 使用者索引
+    """
+    一個房間的 16 個位置，位置編號從 1 開始。
+    另外以使用者名稱與 user_id 建立索引，查詢、加入、移動、移除都是 O(1)。
+
+    找不到使用者時 `get`/`move`/`remove_from_username`/`set_team` 回傳 None，
+    不會丟出例外；只有 `slots[...]` 會丟出 KeyError。
+
+    狀態、隊伍與每個 mod 的人數在每次變動時更新，所以 `all_ready`、`all_have`
+    等查詢不需要逐一檢查玩家。Slot 的內容只能透過這裡的方法修改。
+    """
+
+    __slots__ = (
+        "_slots",
+        "_username_slot",
+        "_user_id_slot",
+        "_fresh",
+        "_status_count",
+        "_team_count",
+        "_mod_count",
+    )
 
-    def get(self, username: str):
+    def __init__(self) -> None:
+        self._slots: List[Optional[Slot]] = [None] * SLOT_COUNT  # 位置
+        self._username_slot: Dict[str, int] = {}  # 使用者索引
+        self._user_id_slot: Dict[int, int] = {}  # user_id 索引
+        self._fresh: int = 0  # need_update 為 False 的數量
+        self._status_count: Dict[str, int] = {}
+        self._team_count: Dict[TeamType, int] = {}
+        self._mod_count: List[int] = [0] * MOD_BITS  # 每個 mod 位元有幾個人
+
+    def _account(self, slot: Slot, n: int) -> None:
+        """把 slot 算進 (n=1) 或移出 (n=-1) 統計"""
+        self._status_count[slot.status] = self._status_count.get(slot.status, 0) + n
+        self._team_count[slot.team] = self._team_count.get(slot.team, 0) + n
+        mods = int(slot.enabled_mods)
+        while mods:
+            bit = mods & -mods
+            self._mod_count[bit.bit_length() - 1] += n
+            mods ^= bit
+
+    def _unindex(self, slot: Slot) -> None:
+        self._username_slot.pop(slot.username, None)
+        if slot.user_id is not None:
+            self._user_id_slot.pop(slot.user_id, None)
+
+    def get(self, username: str) -> Optional[Slot]:
         """從username獲取Slot"""
         slot_number = self._username_slot.get(username)
-        return self._slots.get(slot_number)
+        return None if slot_number is None else self._slots[slot_number - 1]
+
+    def get_by_id(self, user_id: int) -> Optional[Slot]:
+        slot_number = self._user_id_slot.get(user_id)
+        return None if slot_number is None else self._slots[slot_number - 1]
 
-    def move(self, username: str, new_slot: int):
-        """移動使用者"""
-        old_slot = self._username_slot[username]  # 獲取使用者的位置
+    def slot_of(self, username: str) -> Optional[int]:
+        """使用者所在的位置編號"""
+        return self._username_slot.get(username)
+
+    def move(self, username: str, new_slot: int) -> Optional[int]:
+        """移動使用者，回傳原本的位置；不在表中時回傳 None"""
+        old_slot = self._username_slot.get(username)
+        if old_slot is None or old_slot == new_slot:
+            return old_slot
+
+        slot = self._slots[old_slot - 1]
+        self.remove(new_slot)  # 正常不會有人，以防狀態不同步
+        self._slots[old_slot - 1] = None
+        self._slots[new_slot - 1] = slot
         self._username_slot[username] = new_slot  # 變更使用者索引
-        self._slots[new_slot] = self._slots.pop(old_slot)
+        if slot.user_id is not None:
+            self._user_id_slot[slot.user_id] = new_slot
+        return old_slot
 
     def set(
         self,
@@ -46,31 +118,157 @@ class Slots(object):
         is_host: bool = False,
         team: TeamType = TeamType.Neutral,
         enabled_mods: Mods = Mods.NoMod,
-    ):
-        """新增使用者"""
-        self._slots[slot_number] = Slot(
-            username, user_id, status, is_host, team, enabled_mods
-        )
-        self._username_slot[username] = slot_number
+    ) -> Slot:
+        """新增或更新使用者，同一個位置的同一個人會沿用原本的 Slot"""
+        slot = self._slots[slot_number - 1]
+        if slot is None or slot.username != username:
+            old = self.remove_from_username(username)  # 之前在別的位置
+            self.remove(slot_number)
+            slot = self._slots[slot_number - 1] = Slot(username)
+            self._username_slot[username] = slot_number
+            if user_id is None and old is not None:
+                user_id = old.user_id
+        else:
+            self._account(slot, -1)
+
+        if user_id is not None and user_id != slot.user_id:
+            if slot.user_id is not None:
+                self._user_id_slot.pop(slot.user_id, None)
+            self._user_id_slot[user_id] = slot_number
+            slot.user_id = user_id
+
+        slot.status = status
+        slot.is_host = is_host
+        slot.team = team
+        slot.enabled_mods = enabled_mods
+        self._account(slot, 1)
+        if slot.need_update:
+            slot.need_update = False
+            self._fresh += 1
+        return slot
+
+    def set_team(self, username: str, team: TeamType) -> Optional[TeamType]:
+        """變更隊伍，回傳原本的隊伍；不在表中時回傳 None"""
+        if (slot := self.get(username)) is None:
+            return None
+        old_team, slot.team = slot.team, team
+        self._team_count[old_team] -= 1
+        self._team_count[team] = self._team_count.get(team, 0) + 1
+        return old_team
+
+    def set_status_all(self, status: str) -> None:
+        """例如 All players are ready 之後所有人都是 Ready"""
+        for slot in self._slots:
+            if slot is not None:
+                slot.status = status
+        self._status_count = {status: len(self)} if len(self) else {}
 
-    def remove(self, slot_number: int):
+    def set_host(self, username: Optional[str]) -> None:
+        """只有 username 的 is_host 為 True，None 表示沒有房主"""
+        for slot in self._slots:
+            if slot is not None:
+                slot.is_host = slot.username == username
+
+    def remove(self, slot_number: int) -> Optional[Slot]:
         """移除使用者"""
-        username = self._slots[slot_number].username
-        del self._username_slot[username]
-        del self._slots[slot_number]
+        slot = self._slots[slot_number - 1]
+        if slot is not None:
+            self._unindex(slot)
+            self._account(slot, -1)
+            self._slots[slot_number - 1] = None
+            if not slot.need_update:
+                self._fresh -= 1
+        return slot
+
+    def remove_from_username(self, username: str) -> Optional[Slot]:
+        slot_number = self._username_slot.get(username)
+        return None if slot_number is None else self.remove(slot_number)
+
+    def mark_stale(self) -> None:
+        """!mp settings 開始時標記所有位置，之後沒被更新到的由 `prune` 移除"""
+        for slot in self._slots:
+            if slot is not None:
+                slot.need_update = True
+        self._fresh = 0
 
-    def remove_from_username(self, username: str):
-        del self._slots[self._username_slot.pop(username)]  # ???
+    def refreshed(self) -> int:
+        """標記後已更新的位置數量"""
+        return self._fresh
 
-    def clear(self):
-        self._slots = {}
+    def prune(self) -> List[Slot]:
+        """移除標記後沒有更新的位置"""
+        removed = []
+        if self._fresh == len(self):
+            return removed
+        for number, slot in self.items():
+            if slot.need_update:
+                removed.append(self.remove(number))
+        return removed
+
+    def clear(self) -> None:
+        self._slots = [None] * SLOT_COUNT
         self._username_slot = {}
+        self._user_id_slot = {}
+        self._fresh = 0
+        self._status_count = {}
+        self._team_count = {}
+        self._mod_count = [0] * MOD_BITS
+
+    # 統計查詢
+
+    def count(self, status: str) -> int:
+        """某個狀態 (Ready、Not Ready、No Map...) 的人數"""
+        return self._status_count.get(status, 0)
+
+    def team_size(self, team: TeamType) -> int:
+        return self._team_count.get(team, 0)
 
-    def __getitem__(self, key):
+    def all_ready(self) -> bool:
+        return bool(self._username_slot) and self.count("Ready") == len(self)
+
+    def all_have(self, mods: Mods) -> bool:
+        """是否所有玩家都開著 mods 中的每個 mod"""
+        if not (total := len(self)):
+            return False
+        mods = int(mods)
+        while mods:
+            bit = mods & -mods
+            if self._mod_count[bit.bit_length() - 1] != total:
+                return False
+            mods ^= bit
+        return True
+
+    @property
+    def common_mods(self) -> Mods:
+        """所有玩家共同的 mod (enabled_mods 的 AND)"""
+        if not (total := len(self)):
+            return Mods.NoMod
+        return Mods(
+            sum(1 << i for i, count in enumerate(self._mod_count) if count == total)
+        )
+
+    def items(self) -> Iterator[Tuple[int, Slot]]:
+        """(位置編號, Slot)，依位置排序"""
+        return (
+            (i + 1, slot)
+            for i, slot in enumerate(list(self._slots))
+            if slot is not None
+        )
+
+    def __getitem__(self, key: Union[int, str]) -> Slot:
         if isinstance(key, int):
-            return self._slots[key]
-        elif isinstance(key, str):
-            return self._slots[self._username_slot[key]]
+            slot = self._slots[key - 1] if 1 <= key <= SLOT_COUNT else None
+        else:
+            slot = self.get(key)
+        if slot is None:
+            raise KeyError(key)
+        return slot
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._username_slot
+
+    def __len__(self) -> int:
+        return len(self._username_slot)
 
-    def __iter__(self):
-        return iter(self._slots.values())
+    def __iter__(self) -> Iterator[Slot]:
+        return (slot for slot in self._slots if slot is not None)
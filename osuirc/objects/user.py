@@ -1,21 +1,19 @@
-from typing import TYPE_CHECKING, Any, Dict
+import sys
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional
 
+from .enums import Priority
 
 if TYPE_CHECKING:
     from ..client import IrcClient
 
 
 class User(object):
+    __slots__ = ("__client", "username", "id", "__weakref__")
+
     def __init__(self, client: "IrcClient", username: str, user_id: int = None) -> None:
         self.__client = client
-        self.username = username
-
-        if username == 'BanchoBot':
-            self.user_id = 3
-            return
-
-        self.user_id = user_id
-        self.__client.loop.create_task(self.__client.send_command("WHOIS " + username))
+        self.username: str = sys.intern(username)
+        self.id: Optional[int] = 3 if username == "BanchoBot" else user_id
 
     def __repr__(self) -> str:
         return f"<User {self.username}>"
@@ -23,9 +21,23 @@ class User(object):
     def __str__(self) -> str:
         return self.username
 
+    @property
+    def user_id(self) -> Awaitable[Optional[int]]:
+        """`await user.user_id`，還不知道時才會透過 WHOIS 查詢"""
+        return self.__client.resolver.resolve(self.username)
+
     async def send(
-        self, message: str, *, action: bool = False, ignore_limit: bool = False
+        self,
+        message: str,
+        *,
+        action: bool = False,
+        ignore_limit: bool = False,
+        priority: Priority = None,
     ):
         await self.__client.send(
-            self.username, message, action=action, ignore_limit=ignore_limit
+            self.username,
+            message,
+            action=action,
+            ignore_limit=ignore_limit,
+            priority=priority,
         )
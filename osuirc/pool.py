@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+from . import metrics
+from .client import IrcClient, MatchEvent
+from .objects.channel import Channel, MpChannel
+from .utils.events import MatchClosed, MatchParted
+
+log = logging.getLogger("IrcClient")
+
+
+class ClientPool:
+    """
+    多個帳號的連線池，用來突破單一帳號的傳送限制。
+
+    `#mp_` 頻道會分配給目前負責最少房間的連線，之後對該頻道的 `send`/`part`
+    都會透過同一個連線。`command` 與 `mp_listen` 會註冊到所有連線。
+    其他頻道 (例如 #osu) 由第一個連線負責。
+    房間關閉 (MatchClosed) 或被伺服器移出頻道時，該頻道不再算在連線的負載中。
+    `metrics_port` 會用一個端點提供所有連線的統計 (以 `client` 標籤區分)。
+
+    ```PY
+    pool = ClientPool([("bot1", "pass1"), ("bot2", "pass2")])
+
+    @pool.mp_listen(AllPlayerReady)
+    async def on_ready(event):
+        await event.channel.send("!mp start 10")
+
+    pool.run()
+    ```
+    """
+
+    def __init__(
+        self,
+        accounts: Iterable[Tuple[str, str]],
+        *,
+        metrics_port: int = None,
+        **kwargs,
+    ) -> None:
+        self.metrics_port: int = metrics_port
+        self.clients: List[IrcClient] = [
+            IrcClient(nickname, password, **kwargs) for nickname, password in accounts
+        ]
+        if not self.clients:
+            raise ValueError("至少需要一個帳號")
+        self.owners: Dict[str, IrcClient] = {}
+        self.loads: Dict[IrcClient, int] = {client: 0 for client in self.clients}
+        for client in self.clients:
+            self._track(client)
+
+    @property
+    def primary(self) -> IrcClient:
+        return self.clients[0]
+
+    def run(self):
+        for client in self.clients:
+            client.running = True
+
+        try:
+            self.primary.loop.run_until_complete(self.start())
+        except KeyboardInterrupt:
+            self.stop()
+        finally:
+            log.info("Closed")
+
+    def stop(self):
+        for client in self.clients:
+            client.stop()
+
+    async def start(self):
+        server = None
+        if self.metrics_port is not None:
+            server = await metrics.serve(
+                (client.metrics for client in self.clients), port=self.metrics_port
+            )
+        try:
+            await asyncio.gather(*(client.start() for client in self.clients))
+        finally:
+            if server is not None:
+                server.close()
+
+    def owner(self, channel_name: str) -> IrcClient:
+        """負責這個頻道(或私人訊息對象)的連線"""
+        if client := self.owners.get(channel_name):
+            return client
+
+        # 例如 !mp make 建立後由伺服器自動加入的房間
+        for client in self.clients:
+            channel = client.channels.get(channel_name)
+            if channel is not None and channel.joined:
+                self._assign(channel_name, client)
+                return client
+        return self.primary
+
+    def _assign(self, channel_name: str, client: IrcClient) -> None:
+        self.owners[channel_name] = client
+        if channel_name[:4] == "#mp_":
+            self.loads[client] += 1
+
+    def _release(self, channel_name: str, client: IrcClient) -> None:
+        if self.owners.get(channel_name) is client:
+            del self.owners[channel_name]
+            if channel_name[:4] == "#mp_":
+                self.loads[client] -= 1
+
+    def _track(self, client: IrcClient) -> None:
+        """房間關閉或離開頻道 (包含伺服器端的 PART) 時釋放負責的連線"""
+
+        async def release(event: Union[MatchClosed, MatchParted]):
+            self._release(event.channel.name, client)
+
+        client.add_listener(MatchClosed, release)
+        client.add_listener(MatchParted, release)
+
+    def _least_loaded(self) -> IrcClient:
+        return min(self.clients, key=self.loads.__getitem__)
+
+    @staticmethod
+    def _channel_name(channel: Union[Channel, str]) -> str:
+        if isinstance(channel, Channel):
+            return channel.name
+        elif isinstance(channel, str):
+            return ["#", ""][channel[0] == "#"] + channel
+        raise ValueError("channel 參數只支援 Channel、str 類別")
+
+    def get_channel(self, channel_name: str) -> Union[Channel, MpChannel]:
+        return self.owner(channel_name).get_channel(channel_name)
+
+    async def join(self, channel: Union[Channel, str]):
+        channel_name = self._channel_name(channel)
+        if (client := self.owners.get(channel_name)) is None:
+            client = (
+                self._least_loaded() if channel_name[:4] == "#mp_" else self.primary
+            )
+            self._assign(channel_name, client)
+        await client.join(channel_name)
+
+    async def part(self, channel: Union[Channel, str]):
+        channel_name = self._channel_name(channel)
+        client = self.owner(channel_name)
+        self._release(channel_name, client)
+        await client.part(channel_name)
+
+    async def send(self, target: str, content: str, **kwargs):
+        await self.owner(target).send(target, content, **kwargs)
+
+    def command(self, name: str = None):
+        def wapper(func):
+            for client in self.clients:
+                client.command(name)(func)
+            return func
+
+        return wapper
+
+    def mp_listen(self, event: MatchEvent, **kwargs):
+        def decorator(func: Callable[[MatchEvent], Any]):
+            for client in self.clients:
+                client.mp_listen(event, **kwargs)(func)
+            return func
+
+        return decorator
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class IrcProtocol(asyncio.Protocol):
+    """
+    從每次 data_received 的資料一次切出所有完整的行，整批解碼後放進佇列。
+    無法解碼的位元組會被替換，不會讓整個連線掛掉。
+    """
+
+    def __init__(self, encoding: str = "UTF-8", *, max_batches: int = 64) -> None:
+        self.encoding: str = encoding
+        self.max_batches: int = max_batches
+        self.transport: Optional[asyncio.Transport] = None
+        self.batches: "asyncio.Queue[Optional[List[str]]]" = asyncio.Queue()
+        self.paused: bool = False
+        self._buffer: bytes = b""
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        buffer = self._buffer + data
+        end = buffer.rfind(b"\n")
+        if end == -1:
+            self._buffer = buffer
+            return
+
+        self._buffer = buffer[end + 1 :]
+        chunk = buffer[:end].decode(self.encoding, "replace")
+        batch = [line for line in map(str.strip, chunk.split("\n")) if line]
+        if batch:
+            self.batches.put_nowait(batch)
+            if not self.paused and self.batches.qsize() >= self.max_batches:
+                # 處理跟不上，先停止從 socket 讀取
+                self.paused = True
+                self.transport.pause_reading()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.batches.put_nowait(None)  # 讓 listen() 知道連線結束
+        self._writable.set()
+
+    def pause_writing(self) -> None:
+        self._writable.clear()
+
+    def resume_writing(self) -> None:
+        self._writable.set()
+
+    async def read_batch(self) -> Optional[List[str]]:
+        """取得下一批訊息，連線結束時回傳 None"""
+        batch = await self.batches.get()
+        if self.paused and self.batches.qsize() <= self.max_batches // 2:
+            self.paused = False
+            self.transport.resume_reading()
+        return batch
+
+
+class IrcWriter:
+    """
+    把同一個事件迴圈週期內送出的指令合併成一次 write。
+    傳輸緩衝超過 high_water 時 `drain` 會等待，直到降到 low_water 以下。
+    """
+
+    def __init__(
+        self,
+        transport: asyncio.Transport,
+        protocol: IrcProtocol,
+        encoding: str = "UTF-8",
+        *,
+        high_water: int = 64 * 1024,
+        low_water: int = 16 * 1024,
+        window: float = 10.0,
+    ) -> None:
+        self.transport: asyncio.Transport = transport
+        self.protocol: IrcProtocol = protocol
+        self.encoding: str = encoding
+        self.window: float = window
+        transport.set_write_buffer_limits(high_water, low_water)
+
+        self.commands: int = 0
+        self.bytes: int = 0
+        self.flushes: int = 0
+        self._pending: List[str] = []
+        self._scheduled: bool = False
+        self._history: Deque[Tuple[float, int]] = deque()  # (時間, 位元組)
+
+    def write(self, command: str) -> None:
+        self._pending.append(command)
+        self.commands += 1
+        if not self._scheduled:
+            self._scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self) -> None:
+        self._scheduled = False
+        if not self._pending or self.transport.is_closing():
+            self._pending.clear()
+            return
+
+        self._pending.append("")  # 最後一行也要有 \r\n
+        data = "\r\n".join(self._pending).encode(self.encoding)
+        self._pending.clear()
+        self.transport.write(data)
+
+        now = time.monotonic()
+        self.bytes += len(data)
+        self.flushes += 1
+        self._history.append((now, len(data)))
+        self._prune(now)
+
+    async def drain(self) -> None:
+        if not self.protocol._writable.is_set():
+            await self.protocol._writable.wait()
+
+    def close(self) -> None:
+        self.flush()
+        self.transport.close()
+
+    def _prune(self, now: float) -> None:
+        while self._history and self._history[0][0] < now - self.window:
+            self._history.popleft()
+
+    def stats(self) -> Dict[str, float]:
+        self._prune(time.monotonic())
+        return {
+            "commands": self.commands,
+            "bytes": self.bytes,
+            "flushes": self.flushes,
+            "bytes_per_second": sum(n for _, n in self._history) / self.window,
+            "flushes_per_second": len(self._history) / self.window,
+            "buffered": self.transport.get_write_buffer_size(),
+        }
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Optional, Tuple
+
+from .objects.channel import MpChannel
+from .objects.enums import Mods, ScoreMode, TeamMode
+
+if TYPE_CHECKING:
+    from .client import IrcClient
+
+log = logging.getLogger("IrcClient")
+
+
+@dataclass(slots=True, frozen=True)
+class MatchTemplate:
+    """建立房間後要套用的設定，None 表示不變更"""
+
+    size: Optional[int] = None
+    team_mode: Optional[TeamMode] = None
+    score_mode: Optional[ScoreMode] = None
+    mods: Optional[Mods] = None
+    freemod: bool = False
+    map_id: Optional[int] = None
+    password: Optional[str] = None
+    refs: Tuple[str, ...] = ()
+    private: bool = False  # 以 !mp makeprivate 建立
+
+    async def apply(self, channel: MpChannel, timeout: float = 10.0) -> MpChannel:
+        """
+        依序送出設定指令並等待每一個回覆。一次只有一個指令在傳送佇列中，
+        多個房間同時設定時 `timeout` 不會被其他房間的指令吃掉。
+        """
+        if self.team_mode is not None or self.score_mode is not None:
+            team_mode = channel.team_mode if self.team_mode is None else self.team_mode
+            await channel.change_settings(
+                team_mode, self.score_mode, self.size, timeout
+            )
+        elif self.size is not None:
+            await channel.change_size(self.size, timeout)
+        if self.mods is not None or self.freemod:
+            await channel.change_mods(self.mods or Mods.NoMod, self.freemod, timeout)
+        if self.map_id is not None:
+            await channel.change_map(self.map_id, timeout=timeout)
+        if self.password is not None:
+            await channel.change_password(self.password, timeout)
+        for ref in self.refs:
+            await channel.add_ref(ref, timeout)
+        return channel
+
+
+async def provision(
+    client: "IrcClient",
+    names: Iterable[str],
+    template: MatchTemplate = MatchTemplate(),
+    *,
+    concurrency: int = 4,
+    timeout: float = 10.0,
+) -> AsyncIterator[MpChannel]:
+    """
+    批次建立房間並套用 `template`，每完成一個就回傳一個 (不依 names 的順序)。
+
+    同時最多有 `concurrency` 個房間在建立或設定中，指令的間隔交給 client 的
+    傳送限制。任何一個房間失敗 (例如已達開房上限) 時停止建立其他房間並丟出例外，
+    已經建立的房間仍在 `client.channels` 中。
+
+    ```PY
+    template = MatchTemplate(size=8, team_mode=TeamMode.TeamVs, refs=("_CHIMERA",))
+    async for channel in provision(bot, [f"QL: Lobby {i}" for i in range(40)], template):
+        print(channel, "ready")
+    ```
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(name: str) -> MpChannel:
+        async with semaphore:
+            channel = await client.make_match(
+                name, private=template.private, timeout=timeout
+            )
+            log.debug("PROVISION: name=%r channel=%r", name, channel)
+            return await template.apply(channel, timeout)
+
+    tasks = [asyncio.create_task(create(name)) for name in names]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """
+    令牌桶：每秒補充 `rate` 個，最多存 `capacity` 個。
+    `consume` 不會等待，令牌可以變成負數(之後的訊息會等更久)。
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self._tokens: float = capacity
+        self._updated: float = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """目前剩餘的令牌"""
+        self._refill()
+        return self._tokens
+
+    def estimate(self, amount: float = 1) -> float:
+        """還要等幾秒才有足夠的令牌"""
+        self._refill()
+        return max(0.0, (amount - self._tokens) / self.rate)
+
+    def consume(self, amount: float = 1) -> None:
+        self._refill()
+        self._tokens -= amount
+
+    async def acquire(self, amount: float = 1) -> float:
+        """等待到有令牌後扣除，回傳等待的秒數"""
+        waited = 0.0
+        while (delay := self.estimate(amount)) > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+        self.consume(amount)
+        return waited
+
+
+class RateLimiter:
+    """
+    依目標分開計算的傳送限制，公開頻道與私人訊息使用不同的令牌桶。
+    要換成別的規則可以繼承並覆寫 `bucket`，再傳給 `IrcClient(rate_limiter=...)`。
+
+    預設值比 Bancho 一般帳號的限制保守一些，Bot 帳號可以自行調高。
+    """
+
+    def __init__(
+        self,
+        *,
+        public_rate: float = 1.0,
+        public_burst: float = 5,
+        private_rate: float = 1.0,
+        private_burst: float = 5,
+    ) -> None:
+        self.public = TokenBucket(public_rate, public_burst)
+        self.private = TokenBucket(private_rate, private_burst)
+        self.stalls: int = 0  # 需要等待的次數
+        self.stalled: float = 0.0  # 總共等待的秒數
+        self.bypassed: int = 0  # ignore_limit 送出的次數
+
+    def bucket(self, target: str) -> TokenBucket:
+        return self.public if target[:1] == "#" else self.private
+
+    async def acquire(self, target: str) -> None:
+        if waited := await self.bucket(target).acquire():
+            self.stalls += 1
+            self.stalled += waited
+
+    def consume(self, target: str) -> None:
+        """記錄略過限制送出的訊息"""
+        self.bypassed += 1
+        self.bucket(target).consume()
+
+    def estimate(self, target: str) -> float:
+        return self.bucket(target).estimate()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "public_tokens": self.public.tokens,
+            "public_wait": self.public.estimate(),
+            "private_tokens": self.private.tokens,
+            "private_wait": self.private.estimate(),
+            "stalls": self.stalls,
+            "stalled_seconds": self.stalled,
+            "bypassed": self.bypassed,
+        }
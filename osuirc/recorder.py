@@ -0,0 +1,155 @@
+import asyncio
+import gzip
+import time
+from typing import IO, TYPE_CHECKING, Dict, Iterator, List, Tuple
+
+from .ratelimit import RateLimiter
+from .utils.events import ClientEvents
+
+if TYPE_CHECKING:
+    from .client import IrcClient
+
+INBOUND = "<"
+OUTBOUND = ">"
+HEADER = "# osuirc-traffic 1"
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TrafficRecorder:
+    """
+    記錄所有收到 (`<`) 與送出 (`>`) 的原始訊息，每行格式為
+    `<開始後的毫秒>\\t<方向>\\t<訊息>`。檔名以 `.gz` 結尾時會壓縮。
+    PASS 指令的密碼不會被記錄。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.file: IO[str] = _open(path, "w")
+        self.started: float = time.monotonic()
+        self.file.write(f"{HEADER} {time.time():.3f}\n")
+
+    def _write(self, direction: str, line: str) -> None:
+        ms = int((time.monotonic() - self.started) * 1000)
+        self.file.write(f"{ms}\t{direction}\t{line}\n")
+
+    def inbound(self, line: str) -> None:
+        self._write(INBOUND, line)
+
+    def outbound(self, line: str) -> None:
+        if line[:5] == "PASS ":
+            line = "PASS ***"
+        self._write(OUTBOUND, line)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def read_traffic(path: str) -> Iterator[Tuple[float, str, str]]:
+    """逐行讀取紀錄檔，回傳 (秒, 方向, 訊息)"""
+    with _open(path, "r") as f:
+        for row in f:
+            if row[:1] == "#":
+                continue
+            ms, direction, line = row.rstrip("\n").split("\t", 2)
+            yield int(ms) / 1000, direction, line
+
+
+class _ReplayWriter:
+    """取代 IrcWriter，只收集送出的指令"""
+
+    def __init__(self) -> None:
+        self.sent: List[str] = []
+
+    def write(self, command: str) -> None:
+        self.sent.append(command)
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _ReplayLimiter(RateLimiter):
+    """播放時不限制傳送速度"""
+
+    async def acquire(self, target: str) -> None:
+        pass
+
+
+class Replayer:
+    """
+    不需要連線，把紀錄檔中收到的訊息依序交給 client 處理。
+    `realtime=True` 時依照紀錄的時間間隔 (除以 `speed`) 播放，否則全速播放。
+    播放完後最多等待 `settle` 秒讓回呼結束，還在等待的回呼 (例如等待紀錄中沒有的事件)
+    會被取消。回呼經由 `send` 送出的訊息不受傳送限制，也會記在 `sent`。
+
+    ```PY
+    bot = IrcClient(NICK, PASS)
+    stats = asyncio.run(Replayer(bot).run("lobby.log.gz"))
+    ```
+    """
+
+    def __init__(self, client: "IrcClient") -> None:
+        self.client: "IrcClient" = client
+        self.writer = _ReplayWriter()
+
+    @property
+    def sent(self) -> List[str]:
+        return self.writer.sent
+
+    async def run(
+        self,
+        path: str,
+        *,
+        realtime: bool = False,
+        speed: float = 1.0,
+        settle: float = 5.0,
+    ) -> Dict[str, float]:
+        client = self.client
+        client.writer = self.writer
+        client.writable.set()
+        client.connected.set()
+        client.events = ClientEvents()
+        rate_limiter, client.rate_limiter = client.rate_limiter, _ReplayLimiter()
+        running, client.running = client.running, True
+        sender = asyncio.create_task(client.sender())
+        try:
+            lines, elapsed = await self._play(path, realtime, speed, settle)
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            client.rate_limiter = rate_limiter
+            client.running = running
+
+        return {
+            "lines": lines,
+            "seconds": elapsed,
+            "lines_per_second": lines / elapsed if elapsed else 0.0,
+            "sent": len(self.writer.sent),
+        }
+
+    async def _play(
+        self, path: str, realtime: bool, speed: float, settle: float
+    ) -> Tuple[int, float]:
+        client = self.client
+        lines = 0
+        started = time.perf_counter()
+        for ts, direction, line in read_traffic(path):
+            if direction != INBOUND:
+                continue
+            if realtime and (delay := ts / speed - (time.perf_counter() - started)) > 0:
+                await asyncio.sleep(delay)
+            await client.feed([line])
+            lines += 1
+        await client.scheduler.join(settle)
+        # 回呼最後送出的訊息還在傳送佇列中
+        while client.sendmsg_queue:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return lines, time.perf_counter() - started
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import sqlite3
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, Optional, Set
+
+from .ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from .client import IrcClient
+
+log = logging.getLogger("IrcClient")
+
+
+class UserResolver:
+    """
+    username -> user_id 查詢。
+
+    只有在 `await user.user_id` 時才會發送 WHOIS，同一個名稱同時只會有一個查詢，
+    WHOIS 依 `rate` 分批送出。`!mp settings` 的 Slot 資訊已經有 user_id，
+    會直接透過 `feed` 寫入，不需要 WHOIS。
+
+    `timeout` 秒內沒有結果的查詢會丟出 asyncio.TimeoutError 並移除，
+    之後再查詢同一個名稱會重新送出 WHOIS。斷線時已送出但還沒回覆的查詢會重新排隊。
+    """
+
+    def __init__(
+        self,
+        client: "IrcClient",
+        *,
+        rate: float = 2.0,
+        burst: float = 10,
+        timeout: float = 30.0,
+    ) -> None:
+        self.client: "IrcClient" = client
+        self.bucket = TokenBucket(rate, burst)
+        self.timeout: float = timeout
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.queue: Deque[str] = deque()
+        self.sent: Set[str] = set()  # 已送出 WHOIS、等待回覆
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+    def resolve(
+        self, username: str, timeout: float = None
+    ) -> "asyncio.Future[Optional[int]]":
+        """回傳 user_id 的 Future，查無此人時結果為 None"""
+        user = self.client.users_cache.get(username)
+        if user is not None and user.id is not None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(user.id)
+            return future
+
+        if (future := self.pending.get(username)) is None:
+            loop = asyncio.get_running_loop()
+            future = self.pending[username] = loop.create_future()
+            loop.call_later(
+                self.timeout if timeout is None else timeout,
+                self._expire,
+                username,
+                future,
+            )
+            if self.client.user_store is not None:
+                # 先查資料庫，沒有才 WHOIS
+                self.client.scheduler.spawn(self._lookup(username))
+            else:
+                self._enqueue(username)
+        return future
+
+    def _enqueue(self, username: str) -> None:
+        self.queue.append(username)
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _lookup(self, username: str) -> None:
+        try:
+            user_id = await self.client.user_store.get(username)
+        except sqlite3.Error:
+            log.exception("讀取 %s 的 user_id 失敗", username)
+            user_id = None
+        if username not in self.pending:
+            return  # 等待期間已經有結果或逾時
+        if user_id is None:
+            self._enqueue(username)
+            return
+        self.client.get_user(username).id = user_id
+        if not (future := self.pending.pop(username)).done():
+            future.set_result(user_id)
+
+    def feed(self, username: str, user_id: int) -> None:
+        """記錄已知的 user_id (WHOIS 311 或 Slot 資訊)"""
+        username = username.replace(" ", "_")  # IRC 上的名稱空白會變成底線
+        user = self.client.get_user(username)
+        if user.id != user_id:
+            user.id = user_id
+            if self.client.user_store is not None:
+                self.client.user_store.put(username, user_id)
+        self.sent.discard(username)
+        if (future := self.pending.pop(username, None)) and not future.done():
+            future.set_result(user_id)
+
+    def fail(self, username: str) -> None:
+        """WHOIS 結束但沒有結果(離線或不存在)"""
+        self.sent.discard(username)
+        if (future := self.pending.pop(username, None)) and not future.done():
+            future.set_result(None)
+
+    async def _run(self) -> None:
+        while True:
+            if not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            username = self.queue.popleft()
+            if username not in self.pending:
+                continue  # 等待期間已經從別的地方得知
+
+            await self.bucket.acquire()
+            if username not in self.pending:
+                continue
+            try:
+                await self.client.send_command("WHOIS " + username)
+            except OSError as e:
+                # 送出途中斷線，重新連線後再查
+                log.warning("WHOIS %s 失敗: %r", username, e)
+                self.queue.appendleft(username)
+                continue
+            self.sent.add(username)
+
+    def _expire(self, username: str, future: asyncio.Future) -> None:
+        if self.pending.get(username) is future:
+            del self.pending[username]
+            self.sent.discard(username)
+            if not future.done():
+                future.set_exception(asyncio.TimeoutError(f"WHOIS {username} 沒有回覆"))
+
+    def requeue(self) -> None:
+        """斷線時呼叫: 已送出但沒有回覆的 WHOIS 重新排隊"""
+        if self.sent:
+            self.queue.extendleft(n for n in self.sent if n in self.pending)
+            self.sent.clear()
+            self._wakeup.set()
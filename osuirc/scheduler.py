@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Coroutine, Deque, Dict, Optional, Set
+
+log = logging.getLogger("IrcClient")
+
+
+class _Lane:
+    __slots__ = ("items", "space", "worker")
+
+    def __init__(self) -> None:
+        self.items: Deque[Coroutine] = deque()
+        self.space = asyncio.Event()
+        self.worker: asyncio.Task = None
+
+
+class Scheduler:
+    """
+    每個頻道一條依序處理的佇列，加上全域的同時處理上限。
+
+    - `submit` 把訊息的處理放進該頻道的佇列，佇列滿了會等待(讓讀取端跟著停下來)
+    - `spawn` 執行使用者的回呼並保留參考，不會讓讀取端等待
+
+    背景工作可能在等待只有讀取端才能交付的訊息 (wait_for、stream、指令的回覆)，
+    所以數量超過 `max_tasks` 時不等待，而是丟棄新的 `shed=True` 工作並記在 `shed`。
+    mp_listen 與指令的回呼不會被丟棄。
+    """
+
+    def __init__(
+        self, *, max_workers: int = 32, max_queue: int = 256, max_tasks: int = 1024
+    ) -> None:
+        self.max_queue: int = max_queue
+        self.max_tasks: int = max_tasks
+        self.lanes: Dict[str, _Lane] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        self.shed: int = 0
+        self._workers = asyncio.Semaphore(max_workers)
+
+    async def submit(self, key: str, coro: Coroutine) -> None:
+        """放進 key (頻道名稱) 的佇列，同一個 key 會依序執行"""
+        while True:
+            lane = self.lanes.get(key)
+            if lane is None:
+                lane = self.lanes[key] = _Lane()
+                lane.worker = asyncio.create_task(self._worker(key, lane))
+
+            if len(lane.items) < self.max_queue:
+                lane.items.append(coro)
+                return
+
+            # 等待期間 worker 可能已經處理完並移除這條佇列，所以醒來後重新取得
+            lane.space.clear()
+            await lane.space.wait()
+
+    def spawn(self, coro: Coroutine, *, shed: bool = False) -> Optional[asyncio.Task]:
+        """
+        建立背景工作並保留參考，完成後自動移除。
+        `shed=True` 的工作在數量達到上限時直接丟棄，回傳 None。
+        """
+        if shed and self.saturated:
+            coro.close()
+            if self.shed == 0 or self.shed % 1000 == 0:
+                log.warning("背景工作已達上限 %d，丟棄新的回呼", self.max_tasks)
+            self.shed += 1
+            return None
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    @property
+    def saturated(self) -> bool:
+        """背景工作數量已達上限"""
+        return len(self.tasks) >= self.max_tasks
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        if not task.cancelled() and (exc := task.exception()):
+            log.error("背景工作發生錯誤", exc_info=exc)
+
+    async def _worker(self, key: str, lane: _Lane) -> None:
+        while lane.items:
+            coro = lane.items.popleft()
+            lane.space.set()
+            async with self._workers:
+                try:
+                    await coro
+                except Exception:
+                    log.exception("處理 %s 的訊息時發生錯誤", key or "伺服器")
+
+        # 閒置的頻道不保留 worker
+        del self.lanes[key]
+
+    async def join(self, timeout: float = None) -> None:
+        """
+        等待所有佇列與背景工作完成。
+        超過 `timeout` 秒還沒結束的背景工作 (例如等待不會出現的事件) 會被取消，
+        佇列中的訊息仍會處理完。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while self.lanes or self.tasks:
+            waiting = [lane.worker for lane in self.lanes.values()]
+            waiting.extend(self.tasks)
+            if deadline is None:
+                await asyncio.wait(waiting)
+                continue
+            if (remaining := deadline - loop.time()) <= 0:
+                break
+            await asyncio.wait(waiting, timeout=remaining)
+
+        if self.tasks:
+            log.warning("取消 %d 個還沒完成的背景工作", len(self.tasks))
+            tasks = list(self.tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        while self.lanes:
+            await asyncio.wait([lane.worker for lane in self.lanes.values()])
+
+    def stats(self) -> Dict[str, Any]:
+        """佇列深度統計"""
+        depths = {key or "*": len(lane.items) for key, lane in self.lanes.items()}
+        return {
+            "queues": depths,
+            "queued": sum(depths.values()),
+            "max_depth": max(depths.values(), default=0),
+            "tasks": len(self.tasks),
+            "shed": self.shed,
+        }
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Tuple
+
+from .objects.enums import Priority
+
+
+class SendQueue:
+    """
+    多條優先順序的傳送佇列。
+    先取優先度最高且不為空的那條，同一條內依目標輪流取出，避免一個很吵的房間
+    把其他房間的訊息擋住。`get` 會一併回傳放進佇列的時間 (`time.monotonic()`)。
+    """
+
+    def __init__(self) -> None:
+        self.lanes: List["OrderedDict[str, Deque[Tuple[str, float]]]"] = [
+            OrderedDict() for _ in Priority
+        ]
+        self._size: int = 0
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def qsize(self) -> int:
+        return self._size
+
+    def put_nowait(
+        self, target: str, command: str, priority: Priority = Priority.Normal
+    ) -> None:
+        lane = self.lanes[priority]
+        if (queue := lane.get(target)) is None:
+            queue = lane[target] = deque()
+        queue.append((command, time.monotonic()))
+        self._size += 1
+        self._ready.set()
+
+    async def get(self) -> Tuple[str, str, float]:
+        while not self._size:
+            self._ready.clear()
+            await self._ready.wait()
+
+        for lane in self.lanes:
+            if lane:
+                target, queue = next(iter(lane.items()))
+                command, queued_at = queue.popleft()
+                if queue:
+                    lane.move_to_end(target)  # 換下一個目標
+                else:
+                    del lane[target]
+                self._size -= 1
+                return target, command, queued_at
+
+    def clear(self) -> None:
+        for lane in self.lanes:
+            lane.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            priority.name: sum(map(len, self.lanes[priority].values()))
+            for priority in Priority
+        }
@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+
+class UserStore:
+    """
+    儲存在 SQLite 的 username -> user_id，讓重新啟動後不用再 WHOIS 一次。
+
+    第一次使用時才開啟資料庫；寫入會先暫存，滿 `batch_size` 筆或
+    `flush_interval` 秒後一次寫入。資料庫只在一個背景執行緒中存取 (讀取也是)，
+    不會卡住 event loop。同一個 user_id 換了名稱會覆蓋舊名稱。
+    """
+
+    def __init__(
+        self, path: str, *, batch_size: int = 100, flush_interval: float = 5.0
+    ) -> None:
+        self.path: str = path
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, int] = {}
+        self._writing: Dict[str, int] = {}  # 已交給背景執行緒、還沒寫入
+        self._last: Optional[asyncio.Future] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """只能在背景執行緒中使用"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "username TEXT PRIMARY KEY COLLATE NOCASE, "
+                "user_id INTEGER NOT NULL UNIQUE, "
+                "updated REAL NOT NULL)"
+            )
+        return self._db
+
+    def _run(self, func, *args) -> asyncio.Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="UserStore")
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def get(self, username: str) -> Optional[int]:
+        if (user_id := self._pending.get(username)) is not None:
+            return user_id
+        if (user_id := self._writing.get(username)) is not None:
+            return user_id
+        return await self._run(self._read, username)
+
+    def _read(self, username: str) -> Optional[int]:
+        row = self.db.execute(
+            "SELECT user_id FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, username: str, user_id: int) -> None:
+        self._pending[username] = user_id
+        if len(self._pending) >= self.batch_size:
+            self._flush_soon()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._flush_soon
+            )
+
+    def _flush_soon(self) -> Optional[asyncio.Future]:
+        """把暫存的資料交給背景執行緒寫入 (單一執行緒，依序寫入)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return self._last
+
+        batch, self._pending = self._pending, {}
+        self._writing.update(batch)
+        future = self._run(self._write, batch)
+        future.add_done_callback(lambda _: self._written(batch))
+        self._last = future
+        return future
+
+    def _written(self, batch: Dict[str, int]) -> None:
+        for username, user_id in batch.items():
+            if self._writing.get(username) == user_id:
+                del self._writing[username]
+
+    def _write(self, batch: Dict[str, int]) -> None:
+        now = time.time()
+        with self.db:
+            for username, user_id in batch.items():
+                # 改名: 先移除同一個 user_id 的舊名稱
+                self.db.execute(
+                    "DELETE FROM users WHERE user_id = ? AND username <> ?",
+                    (user_id, username),
+                )
+                self.db.execute(
+                    "INSERT INTO users VALUES (?, ?, ?) ON CONFLICT(username) "
+                    "DO UPDATE SET user_id = excluded.user_id, updated = excluded.updated",
+                    (username, user_id, now),
+                )
+
+    async def flush(self) -> None:
+        """寫入所有暫存的資料並等待完成"""
+        if (future := self._flush_soon()) is not None:
+            await future
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._executor is not None:
+            await self._run(self._close)
+            self._executor.shutdown()
+            self._executor = None
+        self._last = None
+
+    def _close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
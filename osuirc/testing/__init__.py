@@ -0,0 +1 @@
+from .fakebancho import FakeBancho, LoadGenerator
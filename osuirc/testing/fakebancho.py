@@ -0,0 +1,614 @@
+"""
+本機的假 Bancho 伺服器，用於壓力測試與整合測試。
+
+    python -m osuirc.testing.fakebancho --port 6667 --lobbies 20 --lps 200
+
+```PY
+async with FakeBancho() as server:
+    bot = IrcClient("bot", "pass", host=server.host, port=server.port)
+    ...
+```
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..objects.enums import Mods, ScoreMode, TeamMode
+from ..ratelimit import TokenBucket
+
+log = logging.getLogger("FakeBancho")
+
+SERVER = "cho.ppy.sh"
+BANCHOBOT = "BanchoBot"
+MAPS = [
+    (3360065, "Raimukun - Firmament star", "Cup"),
+    (3461204, "Aitsuki Nakuru - phony", "x"),
+    (2571858, "xi - Blue Zenith", "FOUR DIMENSIONS"),
+    (96, "Hinoi Team - Emoticons", "Normal"),
+]
+
+
+def user_id(username: str) -> int:
+    """固定的假 user_id"""
+    return zlib.crc32(username.lower().encode()) % 30000000 + 1000
+
+
+class Session:
+    def __init__(self, server: "FakeBancho", writer: asyncio.StreamWriter) -> None:
+        self.server = server
+        self.writer = writer
+        self.nick: str = ""
+        self.password: str = ""
+        self.channels: Set[str] = set()
+        self.bucket: Optional[TokenBucket] = (
+            TokenBucket(*server.rate_limit) if server.rate_limit else None
+        )
+
+    def send(self, line: str) -> None:
+        if not self.writer.is_closing():
+            self.writer.write((line + "\r\n").encode())
+            self.server.sent += 1
+
+
+class Player:
+    __slots__ = ("name", "status", "team", "mods")
+
+    def __init__(self, name: str, team: str = "") -> None:
+        self.name = name
+        self.status = "Not Ready"
+        self.team = team
+        self.mods = Mods.NoMod
+
+
+class Lobby:
+    def __init__(self, server: "FakeBancho", mp_id: int, name: str, owner: str):
+        self.server = server
+        self.mp_id = mp_id
+        self.channel = f"#mp_{mp_id}"
+        self.name = name
+        self.owner = owner
+        self.refs: Set[str] = {owner}
+        self.size = 16
+        self.slots: List[Optional[Player]] = [None] * 16
+        self.team_mode = TeamMode.HeadToHead
+        self.score_mode = ScoreMode.Score
+        self.mods = Mods.NoMod
+        self.freemod = False
+        self.password = ""
+        self.host: Optional[str] = None
+        self.beatmap: Tuple[int, str, str] = MAPS[0]
+        self.started = False
+        self.locked = False
+
+    def say(self, content: str) -> None:
+        self.server.broadcast(self.channel, BANCHOBOT, content)
+
+    @property
+    def players(self) -> List[Tuple[int, Player]]:
+        return [(i + 1, p) for i, p in enumerate(self.slots) if p is not None]
+
+    def find(self, name: str) -> Optional[int]:
+        for i, p in enumerate(self.slots):
+            if p is not None and p.name.lower() == name.lower():
+                return i
+        return None
+
+    # 模擬玩家
+
+    def add_player(self, name: str) -> bool:
+        if self.find(name) is not None:
+            return False
+        for i in range(self.size):
+            if self.slots[i] is None:
+                team = ""
+                if self.team_mode in (TeamMode.TeamVs, TeamMode.TagTeamVs):
+                    team = ["blue", "red"][i % 2]
+                self.slots[i] = Player(name, team)
+                self.say(
+                    f"{name} joined in slot {i + 1}"
+                    + (f" for team {team}." if team else ".")
+                )
+                return True
+        return False
+
+    def remove_player(self, name: str) -> None:
+        if (i := self.find(name)) is not None:
+            self.slots[i] = None
+            self.say(f"{name} left the game.")
+
+    def ready_all(self) -> None:
+        for _, p in self.players:
+            p.status = "Ready"
+        if self.players:
+            self.say("All players are ready")
+
+    async def play(self) -> None:
+        await asyncio.sleep(self.server.play_time)
+        if not self.started:
+            return
+        for _, p in self.players:
+            passed = random.random() < 0.8
+            self.say(
+                f"{p.name} finished playing (Score: {random.randint(10000, 1000000)}, "
+                f"{'PASSED' if passed else 'FAILED'})."
+            )
+            p.status = "Not Ready"
+        self.started = False
+        self.say("The match has finished!")
+
+    # !mp 指令
+
+    def command(self, sender: str, args: List[str]) -> None:
+        if sender not in self.refs:
+            return
+        cmd, args = args[0].lower(), args[1:]
+        handler = getattr(self, f"mp_{cmd}", None)
+        if handler is None:
+            return
+        handler(args)
+
+    def mp_settings(self, args: List[str]) -> None:
+        map_id, artist_title, version = self.beatmap
+        self.say(f"Room name: {self.name}, History: https://osu.ppy.sh/mp/{self.mp_id}")
+        self.say(f"Beatmap: https://osu.ppy.sh/b/{map_id} {artist_title} [{version}]")
+        self.say(
+            f"Team mode: {self.team_mode.name}, Win condition: {self.score_mode.name}"
+        )
+        mods = [m.name for m in Mods if m and m.value & self.mods == m.value]
+        if self.freemod:
+            mods.append("Freemod")
+        if mods:
+            self.say(f"Active mods: {', '.join(mods)}")
+        self.say(f"Players: {len(self.players)}")
+        for slot, p in self.players:
+            flags = []
+            if p.name == self.host:
+                flags.append("Host")
+            if p.team:
+                flags.append(f"Team {p.team.capitalize()}")
+            if p.mods:
+                flags.append(", ".join(m.name for m in Mods if m and m in p.mods))
+            flag_text = f"[{' / '.join(flags)}]" if flags else ""
+            self.say(
+                f"Slot {slot:<2} {p.status:<9} https://osu.ppy.sh/u/{user_id(p.name)} "
+                f"{p.name:<16}{flag_text}"
+            )
+
+    def mp_start(self, args: List[str]) -> None:
+        if self.started:
+            return self.say("The match has already been started")
+        delay = int(args[0]) if args and args[0].isdigit() else 0
+        self.started = True
+        asyncio.get_running_loop().create_task(self._start(delay))
+
+    async def _start(self, delay: int) -> None:
+        if delay:
+            self.say(f"Countdown ends in {delay} seconds")
+            await asyncio.sleep(delay * self.server.time_scale)
+        self.say("The match has started!")
+        await self.play()
+
+    def mp_abort(self, args: List[str]) -> None:
+        if not self.started:
+            return self.say("The match is not in progress")
+        self.started = False
+        self.say("Aborted the match")
+
+    def mp_map(self, args: List[str]) -> None:
+        if not args or not args[0].isdigit():
+            return self.say("Invalid map ID provided")
+        map_id = int(args[0])
+        known = {m[0]: m for m in MAPS}
+        self.beatmap = known.get(map_id, (map_id, "Unknown - Beatmap", "Normal"))
+        self.say(f"Changed beatmap to https://osu.ppy.sh/b/{map_id} {self.beatmap[1]}")
+
+    def mp_mods(self, args: List[str]) -> None:
+        self.freemod = any(a.lower() == "freemod" for a in args)
+        mods = Mods.NoMod
+        for a in args:
+            if a.isdigit():
+                mods |= Mods(int(a))
+            else:
+                mods |= {m.name.lower(): m for m in Mods}.get(a.lower(), Mods.NoMod)
+        self.mods = mods
+        names = [m.name for m in Mods if m and m.value & mods == m.value]
+        enabled = f"Enabled {', '.join(names)}" if names else "Disabled all mods"
+        self.say(f"{enabled}, {'en' if self.freemod else 'dis'}abled FreeMod")
+
+    def mp_size(self, args: List[str]) -> None:
+        if not args or not args[0].isdigit() or not 1 <= int(args[0]) <= 16:
+            return self.say("Invalid or no size provided")
+        self.size = int(args[0])
+        self.say(f"Changed match to size {self.size}")
+
+    def mp_set(self, args: List[str]) -> None:
+        try:
+            self.team_mode = TeamMode(int(args[0]))
+            if len(args) > 1:
+                self.score_mode = ScoreMode(int(args[1]))
+            if len(args) > 2:
+                self.size = int(args[2])
+        except (IndexError, ValueError):
+            return self.say("Invalid or no settings provided")
+        self.say(
+            f"Changed match settings to {self.size} slots, "
+            f"{self.team_mode.name}, {self.score_mode.name}"
+        )
+
+    def mp_host(self, args: List[str]) -> None:
+        if not args or self.find(" ".join(args)) is None:
+            return self.say("User not found")
+        self.host = self.slots[self.find(" ".join(args))].name
+        self.say(f"Changed match host to {self.host}")
+
+    def mp_clearhost(self, args: List[str]) -> None:
+        self.host = None
+        self.say("Cleared match host")
+
+    def mp_name(self, args: List[str]) -> None:
+        self.name = " ".join(args)
+        self.say(f'Room name updated to "{self.name}"')
+
+    def mp_password(self, args: List[str]) -> None:
+        self.password = " ".join(args)
+        self.say(f"{'Changed' if self.password else 'Removed'} the match password")
+
+    def mp_lock(self, args: List[str]) -> None:
+        self.locked = True
+        self.say("Locked the match")
+
+    def mp_unlock(self, args: List[str]) -> None:
+        self.locked = False
+        self.say("Unlocked the match")
+
+    def mp_addref(self, args: List[str]) -> None:
+        for ref in args:
+            self.refs.add(ref)
+            self.say(f"Added {ref} to the match referees")
+
+    def mp_removeref(self, args: List[str]) -> None:
+        for ref in args:
+            self.refs.discard(ref)
+            self.say(f"Removed {ref} from the match referees")
+
+    def mp_kick(self, args: List[str]) -> None:
+        name = " ".join(args)
+        if (i := self.find(name)) is None:
+            return self.say("User not found")
+        self.slots[i] = None
+        self.say(f"Kicked {name} from the match")
+
+    def mp_close(self, args: List[str]) -> None:
+        self.say("Closed the match")
+        self.server.close_lobby(self)
+
+
+class FakeBancho:
+    """
+    支援 PASS/NICK、歡迎訊息與 MOTD、JOIN/PART/NAMES、PING、WHOIS，
+    以及 BanchoBot 的 `!mp` 指令。`rate_limit=(每秒, 突發)` 時超過限制的
+    PRIVMSG 會被丟棄並記錄在 `dropped`。
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        rate_limit: Optional[Tuple[float, float]] = None,
+        max_matches: int = 4,
+        play_time: float = 1.0,
+        time_scale: float = 0.0,
+    ) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.rate_limit = rate_limit
+        self.max_matches: int = max_matches
+        self.play_time: float = play_time  # 比賽持續秒數
+        self.time_scale: float = time_scale  # !mp start <秒> 的倒數倍率，0 為不等待
+
+        self.sessions: Dict[str, Session] = {}
+        self.channels: Dict[str, Set[Session]] = {"#osu": set()}
+        self.lobbies: Dict[str, Lobby] = {}
+        self.received: int = 0
+        self.sent: int = 0
+        self.dropped: int = 0
+        self._next_mp_id: int = 100000000
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        for session in list(self.sessions.values()):
+            session.writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # 等連線處理結束，避免關閉事件迴圈時被取消
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def __aenter__(self) -> "FakeBancho":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        await self._server.serve_forever()
+
+    # 傳送
+
+    def broadcast(
+        self, channel: str, sender: str, content: str, *, exclude: Session = None
+    ) -> None:
+        line = f":{sender}!cho@ppy.sh PRIVMSG {channel} :{content}"
+        for session in self.channels.get(channel, ()):
+            if session is not exclude:
+                session.send(line)
+
+    def numeric(self, session: Session, code: str, text: str) -> None:
+        session.send(f":{SERVER} {code} {session.nick} {text}")
+
+    # 房間
+
+    def make_lobby(self, owner: Session, name: str) -> Optional[Lobby]:
+        owned = [l for l in self.lobbies.values() if l.owner == owner.nick]
+        if len(owned) >= self.max_matches:
+            self._pm(
+                owner,
+                "You cannot create any more tournament matches. "
+                "Please close any previous tournament matches you have open.",
+            )
+            return None
+
+        self._next_mp_id += 1
+        lobby = Lobby(self, self._next_mp_id, name, owner.nick)
+        self.lobbies[lobby.channel] = lobby
+        self.channels[lobby.channel] = set()
+        self._join(owner, lobby.channel)
+        self._pm(
+            owner,
+            f"Created the tournament match https://osu.ppy.sh/mp/{lobby.mp_id} {name}",
+        )
+        return lobby
+
+    def close_lobby(self, lobby: Lobby) -> None:
+        for session in list(self.channels.pop(lobby.channel, ())):
+            session.channels.discard(lobby.channel)
+            session.send(f":{session.nick}!cho@ppy.sh PART :{lobby.channel}")
+        self.lobbies.pop(lobby.channel, None)
+
+    def _pm(self, session: Session, content: str) -> None:
+        session.send(f":{BANCHOBOT}!cho@ppy.sh PRIVMSG {session.nick} :{content}")
+
+    # 連線處理
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        session = Session(self, writer)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while raw := await reader.readline():
+                self.received += 1
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                command, _, rest = line.partition(" ")
+                handler = getattr(self, f"_on_{command.lower()}", None)
+                if handler is not None:
+                    handler(session, rest)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._quit(session)
+            writer.close()
+            self._handlers.discard(task)
+
+    def _on_pass(self, session: Session, rest: str) -> None:
+        session.password = rest
+
+    def _on_nick(self, session: Session, rest: str) -> None:
+        session.nick = rest.strip()
+        self.sessions[session.nick] = session
+        self.numeric(session, "001", ":Welcome to the osu!Bancho.")
+        self.numeric(session, "375", ":-")
+        self.numeric(session, "372", ":- Fake Bancho for osuirc")
+        self.numeric(session, "376", ":-")
+
+    def _on_ping(self, session: Session, rest: str) -> None:
+        session.send(f":{SERVER} PONG {SERVER} :{rest.lstrip(':')}")
+
+    def _on_join(self, session: Session, rest: str) -> None:
+        for channel in rest.split(","):
+            channel = channel.strip()
+            if channel not in self.channels:
+                self.numeric(session, "403", f"{channel} :No such channel")
+            else:
+                self._join(session, channel)
+
+    def _join(self, session: Session, channel: str) -> None:
+        members = self.channels[channel]
+        members.add(session)
+        session.channels.add(channel)
+        for member in members:
+            member.send(f":{session.nick}!cho@ppy.sh JOIN :{channel}")
+
+        if lobby := self.lobbies.get(channel):
+            self.numeric(
+                session, "332", f"{channel} :multiplayer game #{lobby.mp_id + 1}"
+            )
+            self.numeric(
+                session,
+                "333",
+                f"{channel} {BANCHOBOT}!{BANCHOBOT}@{SERVER} 1664000000",
+            )
+        names = " ".join(["@" + BANCHOBOT, *(m.nick for m in members)])
+        self.numeric(session, "353", f"= {channel} :{names}")
+        self.numeric(session, "366", f"{channel} :End of /NAMES list.")
+
+    def _on_part(self, session: Session, rest: str) -> None:
+        channel = rest.strip().lstrip(":")
+        if session in self.channels.get(channel, ()):
+            for member in self.channels[channel]:
+                member.send(f":{session.nick}!cho@ppy.sh PART :{channel}")
+            self.channels[channel].discard(session)
+            session.channels.discard(channel)
+
+    def _on_whois(self, session: Session, rest: str) -> None:
+        name = rest.strip()
+        online = name in self.sessions or any(
+            lobby.find(name) is not None for lobby in self.lobbies.values()
+        )
+        if not online:
+            self.numeric(session, "401", f"{name} :No such nick")
+            return
+        url = f"https://osu.ppy.sh/u/{user_id(name)}"
+        self.numeric(session, "311", f"{name} {url} * :{url}")
+        self.numeric(session, "312", f"{name} {SERVER} :{SERVER}")
+        self.numeric(session, "318", f"{name} :End of /WHOIS list.")
+
+    def _on_privmsg(self, session: Session, rest: str) -> None:
+        target, _, content = rest.partition(" :")
+        if session.bucket is not None:
+            if session.bucket.estimate() > 0:
+                self.dropped += 1
+                return
+            session.bucket.consume()
+
+        if target[:1] == "#":
+            self.broadcast(target, session.nick, content, exclude=session)
+            if content[:4] == "!mp " and (lobby := self.lobbies.get(target)):
+                lobby.command(session.nick, content.split()[1:])
+        elif target == BANCHOBOT:
+            args = content.split(" ", 2)
+            if (
+                args[0] == "!mp"
+                and len(args) == 3
+                and args[1] in ("make", "makeprivate")
+            ):
+                self.make_lobby(session, args[2])
+        elif other := self.sessions.get(target):
+            other.send(f":{session.nick}!cho@ppy.sh PRIVMSG {target} :{content}")
+
+    def _on_quit(self, session: Session, rest: str) -> None:
+        session.writer.close()
+
+    def _quit(self, session: Session) -> None:
+        for channel in session.channels:
+            self.channels.get(channel, set()).discard(session)
+        if self.sessions.get(session.nick) is session:
+            del self.sessions[session.nick]
+
+
+class LoadGenerator:
+    """
+    產生假流量：#osu 的聊天訊息，以及 `lobbies` 個房間的玩家加入、準備、
+    比賽開始/結束。`lines_per_second` 是整體的訊息量。
+    房間會歸屬於 `owner` (需已連線)，讓機器人可以對它們下 `!mp` 指令。
+    """
+
+    def __init__(
+        self,
+        server: FakeBancho,
+        *,
+        owner: str,
+        lobbies: int = 10,
+        lines_per_second: float = 100.0,
+        players: int = 8,
+    ) -> None:
+        self.server = server
+        self.owner = owner
+        self.lines_per_second = lines_per_second
+        self.players = players
+        self.lobby_count = lobbies
+        self.lobbies: List[Lobby] = []
+        self.generated: int = 0
+
+    def setup(self) -> List[Lobby]:
+        session = self.server.sessions[self.owner]
+        self.server.max_matches = max(self.server.max_matches, self.lobby_count)
+        for i in range(self.lobby_count):
+            lobby = self.server.make_lobby(session, f"load test {i}")
+            self.lobbies.append(lobby)
+        return self.lobbies
+
+    def step(self) -> None:
+        """產生一行流量"""
+        self.generated += 1
+        if not self.lobbies or random.random() < 0.5:
+            self.server.broadcast(
+                "#osu", f"user{random.randint(1, 5000)}", "hello osu! " * 3
+            )
+            return
+
+        lobby = random.choice(self.lobbies)
+        if lobby.started:
+            lobby.say("Host is changing map...")
+        elif len(lobby.players) < self.players:
+            lobby.add_player(f"player{lobby.mp_id % 1000}_{len(lobby.players)}")
+        elif any(p.status != "Ready" for _, p in lobby.players):
+            lobby.ready_all()
+        else:
+            slot, player = random.choice(lobby.players)
+            lobby.remove_player(player.name)
+
+    async def run(self, duration: float) -> int:
+        if not self.lobbies and self.lobby_count:
+            self.setup()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while (elapsed := loop.time() - started) < duration:
+            target = int(elapsed * self.lines_per_second)
+            while self.generated < target:
+                self.step()
+            await asyncio.sleep(0.01)
+        return self.generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="osuirc 測試用的假 Bancho")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6667)
+    parser.add_argument("--rate", type=float, help="每秒訊息限制")
+    parser.add_argument("--burst", type=float, default=10)
+    parser.add_argument("--owner", help="負載房間的擁有者暱稱")
+    parser.add_argument("--lobbies", type=int, default=0)
+    parser.add_argument("--lps", type=float, default=0, help="每秒產生的訊息量")
+    args = parser.parse_args()
+    logging.basicConfig(level="INFO")
+
+    async def run():
+        server = FakeBancho(
+            args.host,
+            args.port,
+            rate_limit=(args.rate, args.burst) if args.rate else None,
+        )
+        await server.start()
+        log.info("listening on %s:%s", server.host, server.port)
+        if args.owner and args.lps:
+            while args.owner not in server.sessions:
+                await asyncio.sleep(0.1)
+            generator = LoadGenerator(
+                server,
+                owner=args.owner,
+                lobbies=args.lobbies,
+                lines_per_second=args.lps,
+            )
+            await generator.run(float("inf"))
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
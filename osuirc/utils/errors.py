@@ -8,3 +8,12 @@ class LoginFailError(Exception):
 
 class NotInChannel(Exception):
     pass
+
+
+class MatchCommandError(Exception):
+    """BanchoBot 回覆 !mp 指令失敗"""
+
+    def __init__(self, command: str, reply: str) -> None:
+        super().__init__(f"{command}: {reply}")
+        self.command: str = command
+        self.reply: str = reply
@@ -1,5 +1,6 @@
 from asyncio import Event
 from dataclasses import dataclass
+from typing import Any, Dict, Tuple
 
 from osuirc.objects.channel import MpChannel
 from osuirc.objects.enums import GameMode, Mods, ScoreMode, TeamMode, TeamType
@@ -7,59 +8,61 @@ from osuirc.objects.osu import Beatmap
 
 
 class ClientEvents:
+    __slots__ = ("welcome", "motd_start", "motd_end")
+
     def __init__(self) -> None:
         self.welcome = Event()
         self.motd_start = Event()
         self.motd_end = Event()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BaseMatchEvent:
     channel: MpChannel
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchLockChanged(BaseMatchEvent):
     old: bool
     new: bool
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchSizeChanged(BaseMatchEvent):
     old: bool
     new: bool
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchTeamModeChanged(BaseMatchEvent):
     old: TeamMode
     new: TeamMode
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchScoreModeChanged(BaseMatchEvent):
     old: ScoreMode
     new: ScoreMode
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchGameModeChanged(BaseMatchEvent):
     old: GameMode
     new: GameMode
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchHostChanged(BaseMatchEvent):
     old: str
     new: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchPasswordChanged(BaseMatchEvent):
     has_password: bool
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchModsChanged(BaseMatchEvent):
     old_mods: Mods
     new_mods: Mods
@@ -67,135 +70,139 @@ class MatchModsChanged(BaseMatchEvent):
     new_freemod: bool
 
 
-@dataclass
-class MatchPlayerCountChanged(BaseMatchEvent):
-    old: int
-    new: int
-
-
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchMapChanged(BaseMatchEvent):
     old: Beatmap | None
     new: Beatmap | None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchStarted(BaseMatchEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchFinished(BaseMatchEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchAborted(BaseMatchEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchRefereeAdded(BaseMatchEvent):
     ref: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchRefereeRemoved(BaseMatchEvent):
     ref: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchTimerStarted(BaseMatchEvent):
     time: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchTimerStopped(BaseMatchEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchTimerAborted(BaseMatchEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchCreated(BaseMatchEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MatchClosed(BaseMatchEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class MatchParted(BaseMatchEvent):
+    """離開房間頻道 (自己 PART 或被伺服器移出，例如房間關閉後) 時觸發"""
+
+
+@dataclass(slots=True, frozen=True)
 class MatchRoomNameChanged(BaseMatchEvent):
     old: str
     new: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerJoined(BaseMatchEvent):
     user: str
     slot: int
     team: TeamType = TeamType.Neutral
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerLeft(BaseMatchEvent):
     user: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerKicked(BaseMatchEvent):
     user: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerBanned(BaseMatchEvent):
     user: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerSlotChanged(BaseMatchEvent):
     user: str
-    old: int
+    old: int | None  # 不在位置表中時為 None
     new: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerTeamChanged(BaseMatchEvent):
     user: str
-    old: TeamType
+    old: TeamType | None  # 不在位置表中時為 None
     new: TeamType
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerModsChanged(BaseMatchEvent):
     user: str
     old: Mods
     new: Mods
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayerFinished(BaseMatchEvent):
     user: str
     score: int
     passed: bool
 
 
-@dataclass
-class SlotUpdated(BaseMatchEvent):
-    slot_number: int
-    username: str
-    user_id: int
-    status: str
-    is_host: bool
-    team: TeamType
-    enabled_mods: Mods
+@dataclass(slots=True, frozen=True)
+class MatchSettingsUpdated(BaseMatchEvent):
+    """
+    整份 !mp settings 回覆套用到房間後觸發一次。
+    `changes` 只包含有變動的房間欄位: 欄位名稱 -> (舊值, 新值)，
+    例如 room_name、current_map、team_mode、score_mode、active_mods、freemod、
+    player_count、host。
+    team_mode、score_mode 有變動時另外觸發 MatchTeamModeChanged、MatchScoreModeChanged。
+    """
+
+    changes: Dict[str, Tuple[Any, Any]]
+    joined: Tuple[str, ...]  # 新出現的玩家
+    left: Tuple[str, ...]  # 不在房間的玩家
+    updated: Tuple[str, ...]  # 位置、狀態、隊伍、mod 或房主有變動的玩家
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AllPlayerReady(BaseMatchEvent):
     pass
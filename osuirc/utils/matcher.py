@@ -0,0 +1,34 @@
+import re
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+# 開頭是固定文字的 pattern，取第一個字當索引
+_LITERAL_WORD = re.compile(r"([A-Za-z:]+) ")
+
+Rule = Tuple[Pattern[str], Callable]
+
+
+class LineMatcher:
+    """
+    BanchoBot 訊息分類器，每行只回傳一個處理程序。
+
+    開頭是固定文字的 pattern 依第一個字建立索引，開頭是使用者名稱的 pattern
+    (例如 `xxx moved to slot 5`) 放在最後比對。
+    全部使用 fullmatch，避免特製的使用者名稱同時符合兩種訊息。
+    """
+
+    def __init__(self, rules: Dict[Pattern[str], Callable]) -> None:
+        self.index: Dict[str, List[Rule]] = {}
+        self.generic: List[Rule] = []
+
+        for pattern, handler in rules.items():
+            if m := _LITERAL_WORD.match(pattern.pattern):
+                self.index.setdefault(m.group(1), []).append((pattern, handler))
+            else:
+                self.generic.append((pattern, handler))
+
+    def match(self, content: str) -> Optional[Tuple[Pattern[str], Callable, dict]]:
+        for rules in (self.index.get(content.partition(" ")[0], ()), self.generic):
+            for pattern, handler in rules:
+                if m := pattern.fullmatch(content):
+                    return pattern, handler, m.groupdict()
+        return None
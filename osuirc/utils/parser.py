@@ -0,0 +1,50 @@
+from typing import List, NamedTuple, Optional
+
+
+class IrcLine(NamedTuple):
+    raw: str
+    prefix: str
+    command: str
+    params: List[str]
+
+    @property
+    def nick(self) -> str:
+        """prefix 中 `!` 前的暱稱，伺服器訊息則為伺服器名稱"""
+        return self.prefix.partition("!")[0]
+
+    @property
+    def channel(self) -> str:
+        """訊息所屬的頻道，沒有則回傳空字串"""
+        if self.command.isdigit():
+            # 數字代碼第一個參數是自己的暱稱，最後一個是說明文字
+            for param in self.params[1:-1]:
+                if param[:1] == "#":
+                    return param
+        elif self.params and self.params[0][:1] == "#":
+            return self.params[0]
+        return ""
+
+
+def parse_line(raw: str) -> Optional[IrcLine]:
+    """
+    將一行 IRC 訊息切成 prefix、command(或數字代碼)、params，只切一次。
+    最後一個參數 (`:` 之後) 會保留空白。無法解析時回傳 None。
+    """
+    prefix = ""
+    rest = raw
+    if raw[:1] == ":":
+        prefix, _, rest = raw[1:].partition(" ")
+
+    if not rest or rest[0] == ":":
+        return None
+
+    if (i := rest.find(" :")) != -1:
+        params = rest[:i].split()
+        params.append(rest[i + 2 :])
+    else:
+        params = rest.split()
+
+    if not params:
+        return None
+
+    return IrcLine(raw, prefix, params.pop(0).upper(), params)
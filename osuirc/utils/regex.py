@@ -22,6 +22,9 @@ WHOISCHANNELS = re.compile(r"^:cho\.ppy\.sh 319 .+ (.+) :(.*)")
 
 
 MP_GAMEID = re.compile(r"multiplayer game #(\d+)")
+MP_CREATED = re.compile(
+    r"Created the tournament match https://osu.ppy.sh/mp/(?P<mp_id>\d+) (?P<name>.*)"
+)
 MP_LOCKED = re.compile(r"Locked the match")
 MP_UNLOCK = re.compile(r"Unlocked the match")
 MP_CHANGED_SIZE = re.compile(r"Changed match to size (?P<size>\d{1,2})")
@@ -29,6 +32,7 @@ MP_CHANGED_SET = re.compile(r"Changed match settings to (?P<settings>.*)")
 MP_PLAYER_MOVED = re.compile(r"(?P<username>.*) moved to slot (?P<new_slot>\d{1,2})")
 MP_CHANGED_HOST = re.compile(r"(?P<host>.*) became the host.")
 MP_CLEARHOST = re.compile(r"Cleared match host")
+MP_HOST_SET = re.compile(r"Changed match host to (?P<host>.+)")
 MP_CHANGED_NAME = re.compile(r"Room name updated to \"(?P<room_name>.*)\"")
 MP_UPDATE_NAME = re.compile(r"Room name: (?P<room_name>.*),.*")
 MP_UPDATE_MAP = re.compile(
@@ -43,13 +47,14 @@ MP_CHANGED_MAP2 = re.compile(
 MP_UPDATE_SET = re.compile(
     r"Team mode: (?P<team_mode>\S+), Win condition: (?P<score_mode>\S+)"
 )
+MP_UPDATE_MODS = re.compile(r"Active mods: (?P<mods>.+)")
 MP_UPDATE_PC = re.compile(r"Players: (?P<player_count>\d+)")
 MP_SLOT_INFO = re.compile(
-    r"Slot (?P<slot>\d{1,2})  (?P<status>Ready|Not Ready|No Map)\s*https://osu\.ppy\.sh/u/(?P<user_id>\d+) (?P<user_name>\S*)(?P<flags>.*)"
+    r"Slot (?P<slot>\d{1,2})\s+(?P<status>Ready|Not Ready|No Map)\s*https://osu\.ppy\.sh/u/(?P<user_id>\d+) (?P<user_name>.+?)\s*(?P<flags>\[.*\])?"
 )
 MP_STARTED = re.compile(r"The match has started!")
 MP_ABORTED = re.compile(r"Aborted the match")
-MP_CHANGED_TEAM = re.compile(r"(?P<user>) changed to (?P<team>Red|Blue)")
+MP_CHANGED_TEAM = re.compile(r"(?P<user>.*) changed to (?P<team>Red|Blue)")
 MP_CHANGED_MODE = re.compile(
     r"Changed match mode to (?P<game_mode>OsuMania|Osu|Taiko|CatchTheBeat)"
 )
@@ -60,12 +65,14 @@ MP_CHANGED_PASSWD = re.compile(r"(?P<password>Removed|Changed) the match passwor
 MP_ADDED_REF = re.compile(r"Added (?P<ref>.*) to the match referees")
 MP_REMOVED_REF = re.compile(r"Removed (?P<ref>.*) from the match referees")
 MP_KICKED = re.compile(r"Kicked (?P<user>.*) from the match")
-MP_TIMER_START = re.compile(r"Countdown ends in (\d+) (minutes|seconds)")
+MP_TIMER_START = re.compile(
+    r"Countdown ends in (?P<time>\d+) (?P<unit>minute|second)s?"
+)
 MP_TIMER_ABORT = re.compile(r"Countdown aborted")
 MP_BANNED = re.compile(r"Banned (?P<user>.*) from the match")
 MP_CLOSE = re.compile(r"Closed the match")
 MP_JOIN = re.compile(
-    r"(?P<user>.*) joined in slot (?P<slot>\d+)( for team (?P<team>blue|red))\."
+    r"(?P<user>.*) joined in slot (?P<slot>\d+)(?: for team (?P<team>blue|red))?\."
 )
 MP_LEFT = re.compile(r"(?P<user>.*) left the game.")
 MP_ALL_READY = re.compile(r"All players are ready")
@@ -73,3 +80,14 @@ MP_FINISED_PLAYING = re.compile(
     r"(?P<user>.*) finished playing \(Score: (?P<score>\d+), (?P<status>FAILED|PASSED)\)\."
 )
 MP_FINISED = re.compile(r"The match has finished!")
+
+# !mp 指令失敗的回覆
+MP_ERR_STARTED = re.compile(r"The match has already been started")
+MP_ERR_NOT_STARTED = re.compile(r"The match is not in progress")
+MP_ERR_MAP = re.compile(r"Invalid map ID provided")
+MP_ERR_SIZE = re.compile(r"Invalid or no size provided")
+MP_ERR_SETTINGS = re.compile(r"Invalid or no settings provided")
+MP_ERR_USER = re.compile(r"User not found")
+MP_ERR_MAKE = re.compile(
+    r"(?P<reason>You cannot create any more tournament matches\. .*)"
+)
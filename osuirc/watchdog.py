@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Coroutine, Deque, Dict, Generator, List, NamedTuple, Tuple
+
+from .metrics import Histogram
+
+log = logging.getLogger("IrcClient")
+
+
+class SlowCallback(NamedTuple):
+    name: str
+    event: str
+    channel: str
+    blocked: float  # 單次佔用事件迴圈最久的秒數
+    elapsed: float  # 從開始到結束的秒數 (包含 await 的等待)
+    when: float
+
+
+class _Watched:
+    """逐步執行 coroutine，量每一步佔用事件迴圈的時間"""
+
+    __slots__ = ("watchdog", "coro", "name", "event", "channel")
+
+    def __init__(self, watchdog, coro, name, event, channel) -> None:
+        self.watchdog: "Watchdog" = watchdog
+        self.coro: Coroutine = coro
+        self.name: str = name
+        self.event: str = event
+        self.channel: str = channel
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coro = self.coro
+        started = time.perf_counter()
+        blocked = 0.0
+        value, error = None, None
+        try:
+            while True:
+                step = time.perf_counter()
+                try:
+                    if error is None:
+                        future = coro.send(value)
+                    else:
+                        future = coro.throw(error)
+                except StopIteration as e:
+                    return e.value
+                finally:
+                    blocked = max(blocked, time.perf_counter() - step)
+
+                try:
+                    value, error = (yield future), None
+                except GeneratorExit:
+                    coro.close()
+                    raise
+                except BaseException as e:
+                    value, error = None, e
+        finally:
+            self.watchdog.record(
+                self.name,
+                self.event,
+                self.channel,
+                blocked,
+                time.perf_counter() - started,
+            )
+
+
+class Watchdog:
+    """
+    事件迴圈的監視器 (需要自行開啟)。
+
+    - 每 `interval` 秒量一次事件迴圈的延遲
+    - 計時每個交給使用者的回呼 (`mp_listen`、`command`、`on_*`)，
+      單次佔用事件迴圈超過 `threshold` 秒的會記錄名稱、事件與頻道並發出警告
+    - `report()` 依最近 `history` 筆慢回呼整理出最嚴重的回呼
+
+    ```PY
+    bot = IrcClient(NICK, PASS, watchdog=True)
+    ...
+    for row in bot.watchdog.report():
+        print(row)
+    ```
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.5,
+        threshold: float = 0.1,
+        history: int = 200,
+    ) -> None:
+        self.interval: float = interval
+        self.threshold: float = threshold
+        self.lag: Histogram = Histogram()
+        self.max_lag: float = 0.0
+        self.last_lag: float = 0.0
+        self.callbacks: int = 0
+        self.slow: Deque[SlowCallback] = deque(maxlen=history)
+        self._task: asyncio.Task = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sample())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.lag.observe(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                log.warning("事件迴圈延遲 %.3f 秒", lag)
+
+    def watch(
+        self, coro: Coroutine, name: str = None, event: str = "", channel: str = ""
+    ) -> Coroutine:
+        """包裝回呼，執行結束時記錄"""
+        return self._run(
+            _Watched(self, coro, name or coro.__qualname__, event, channel)
+        )
+
+    @staticmethod
+    async def _run(watched: _Watched) -> Any:
+        return await watched
+
+    def record(
+        self, name: str, event: str, channel: str, blocked: float, elapsed: float
+    ) -> None:
+        self.callbacks += 1
+        if blocked > self.threshold:
+            self.slow.append(
+                SlowCallback(name, event, channel, blocked, elapsed, time.time())
+            )
+            log.warning(
+                "回呼 %s (%s %s) 佔用事件迴圈 %.3f 秒",
+                name,
+                event or "-",
+                channel or "-",
+                blocked,
+            )
+
+    def report(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """最近的慢回呼依 (名稱, 事件) 分組，最嚴重的在前面"""
+        groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for slow in self.slow:
+            row = groups.get((slow.name, slow.event))
+            if row is None:
+                row = groups[slow.name, slow.event] = {
+                    "name": slow.name,
+                    "event": slow.event,
+                    "count": 0,
+                    "worst": 0.0,
+                    "total": 0.0,
+                    "channels": set(),
+                    "last": 0.0,
+                }
+            row["count"] += 1
+            row["worst"] = max(row["worst"], slow.blocked)
+            row["total"] += slow.blocked
+            row["last"] = slow.when
+            if slow.channel:
+                row["channels"].add(slow.channel)
+
+        rows = sorted(groups.values(), key=lambda r: r["worst"], reverse=True)
+        for row in rows:
+            row["channels"] = sorted(row["channels"])
+        return rows[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lag": self.lag.to_dict(),
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "callbacks": self.callbacks,
+            "slow": len(self.slow),
+            "worst": self.report(5),
+        }
@@ -13,7 +13,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/NotPeOpLe/osuirc",
     license="MIT",
-    packages=["osuirc", "osuirc.utils", "osuirc.objects"],
+    packages=["osuirc", "osuirc.utils", "osuirc.objects", "osuirc.testing"],
     classifiers=[
         "Programming Language :: Python :: 3.9",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from osuirc import IrcClient
+from osuirc.testing import FakeBancho
+
+
+class OutagePolicyTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeBancho()
+        await self.server.start()
+        self.tasks = []
+
+    async def asyncTearDown(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.server.close()
+
+    async def start(self, nickname: str, **kwargs) -> IrcClient:
+        client = IrcClient(
+            nickname,
+            "pass",
+            host=self.server.host,
+            port=self.server.port,
+            **kwargs,
+        )
+        client.running = True
+        self.tasks.append(asyncio.create_task(client.start()))
+        await asyncio.wait_for(client.connected.wait(), 5)
+        await client.join("#osu")
+        return client
+
+    async def test_drop_discards_messages_sent_during_outage(self):
+        received = []
+        delivered = asyncio.Event()
+        watcher = await self.start("watcher")
+
+        async def on_message(ctx):
+            received.append(ctx.content)
+            if ctx.content == "after reconnect":
+                delivered.set()
+
+        watcher.on_message = on_message
+        bot = await self.start("bot", outage_policy="drop", reconnect_delay=0.2)
+
+        self.server.sessions["bot"].writer.close()
+        while not bot.in_outage:
+            await asyncio.sleep(0.01)
+        await bot.send("#osu", "sent during outage")
+        await bot.send("#osu", "sent during outage", ignore_limit=True)
+
+        await asyncio.wait_for(bot.connected.wait(), 5)
+        await bot.send("#osu", "after reconnect")
+        await asyncio.wait_for(delivered.wait(), 5)
+
+        self.assertNotIn("sent during outage", received)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from osuirc import ClientPool
+
+
+class PoolReleaseTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = ClientPool([("bot1", "pass"), ("bot2", "pass")], reconnect=False)
+        for client in self.pool.clients:
+
+            async def send_command(content: str):
+                pass
+
+            client.send_command = send_command
+        for name in ("#mp_1", "#mp_2", "#mp_3"):
+            await self.pool.join(name)
+
+    def loads(self):
+        return sorted(self.pool.loads.values())
+
+    async def test_closed_and_parted_lobbies_are_released(self):
+        self.assertEqual(self.loads(), [1, 2])
+
+        client = self.pool.owners["#mp_1"]
+        await client.feed([":BanchoBot!cho@ppy.sh PRIVMSG #mp_1 :Closed the match"])
+        await client.scheduler.join()
+        self.assertNotIn("#mp_1", self.pool.owners)
+
+        client = self.pool.owners["#mp_2"]
+        await client.feed([f":{client.nickname}!cho@ppy.sh PART :#mp_2"])
+        await client.scheduler.join()
+        self.assertNotIn("#mp_2", self.pool.owners)
+        self.assertEqual(self.loads(), [0, 1])
+
+    def test_part_handler_is_not_replaced(self):
+        for client in self.pool.clients:
+            self.assertNotIn("on_part", vars(client))
+
+
+if __name__ == "__main__":
+    unittest.main()
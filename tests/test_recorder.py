@@ -0,0 +1,66 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from osuirc import IrcClient
+from osuirc.recorder import (
+    INBOUND,
+    OUTBOUND,
+    Replayer,
+    TrafficRecorder,
+    read_traffic,
+)
+from osuirc.testing import FakeBancho
+from osuirc.utils.events import AllPlayerReady
+
+BANCHOBOT = ":BanchoBot!cho@ppy.sh PRIVMSG #mp_1 :"
+
+
+class RecorderTest(unittest.IsolatedAsyncioTestCase):
+    async def test_start_flushes_compressed_recording(self):
+        path = os.path.join(tempfile.mkdtemp(), "traffic.log.gz")
+        async with FakeBancho() as server:
+            bot = IrcClient(
+                "bot",
+                "secret",
+                host=server.host,
+                port=server.port,
+                reconnect=False,
+                recorder=TrafficRecorder(path),
+            )
+            bot.running = True
+            task = asyncio.create_task(bot.start())
+            await asyncio.wait_for(bot.connected.wait(), 5)
+            bot.stop()
+            server.sessions["bot"].writer.close()
+            await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), 5)
+
+        records = list(read_traffic(path))
+        self.assertIn((OUTBOUND, "PASS ***"), [(d, l) for _, d, l in records])
+        self.assertTrue(any(d == INBOUND for _, d, _ in records))
+
+
+class ReplayerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_callback_sends_are_captured(self):
+        path = os.path.join(tempfile.mkdtemp(), "lobby.log")
+        recorder = TrafficRecorder(path)
+        for line in ("p1 joined in slot 1.", "All players are ready"):
+            recorder.inbound(BANCHOBOT + line)
+        recorder.close()
+
+        bot = IrcClient("TourneyBot", "", reconnect=False)
+
+        @bot.mp_listen(AllPlayerReady)
+        async def on_ready(event: AllPlayerReady):
+            await event.channel.send("!mp start 10")
+
+        replayer = Replayer(bot)
+        stats = await asyncio.wait_for(replayer.run(path, settle=1), 5)
+
+        self.assertIn("PRIVMSG #mp_1 :!mp start 10", replayer.sent)
+        self.assertEqual(stats["sent"], len(replayer.sent))
+
+
+if __name__ == "__main__":
+    unittest.main()
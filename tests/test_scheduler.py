@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+
+from osuirc import IrcClient
+from osuirc.scheduler import Scheduler
+from osuirc.utils.events import MatchStarted, PlayerJoined
+
+BANCHOBOT = ":BanchoBot!cho@ppy.sh PRIVMSG #mp_1 :"
+
+
+def client(max_tasks: int) -> IrcClient:
+    client = IrcClient("TourneyBot", "", reconnect=False)
+    client.scheduler = Scheduler(max_tasks=max_tasks)
+    return client
+
+
+class TaskLimitTest(unittest.IsolatedAsyncioTestCase):
+    async def test_waiters_outnumber_task_limit(self):
+        bot = client(max_tasks=3)
+        started = []
+
+        @bot.mp_listen(PlayerJoined)
+        async def on_joined(event: PlayerJoined):
+            await bot.wait_for(MatchStarted, channel=event.channel, timeout=5)
+            started.append(event.user)
+
+        joins = [f"{BANCHOBOT}p{i} joined in slot {i + 1}." for i in range(4)]
+        # 等待中的回呼超過上限時，讀取端仍要能交付它們等待的訊息
+        await asyncio.wait_for(bot.feed(joins), 1)
+        await asyncio.sleep(0)
+        await asyncio.wait_for(bot.feed([BANCHOBOT + "The match has started!"]), 1)
+        await asyncio.wait_for(bot.scheduler.join(), 1)
+
+        # mp_listen 的回呼不會被丟棄 (房間訊息的 on_message 可能被丟棄)
+        self.assertEqual(sorted(started), ["p0", "p1", "p2", "p3"])
+
+    async def test_client_events_are_shed_at_limit(self):
+        bot = client(max_tasks=3)
+        gate = asyncio.Event()
+
+        async def on_message(ctx):
+            await gate.wait()
+
+        bot.on_message = on_message
+        lines = [f":user{i}!cho@ppy.sh PRIVMSG #osu :hello" for i in range(5)]
+        await asyncio.wait_for(bot.feed(lines), 1)
+        await asyncio.wait_for(bot.scheduler.join(0.1), 1)
+
+        self.assertEqual(bot.scheduler.shed, 2)
+        self.assertEqual(bot.scheduler.stats()["shed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from osuirc import IrcClient
+from osuirc.store import UserStore
+
+
+class UserStoreTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "users.db")
+
+    async def test_database_is_only_used_off_the_loop(self):
+        store = UserStore(self.path, batch_size=2)
+        threads = set()
+        for name in ("_read", "_write"):
+            func = getattr(store, name)
+
+            def traced(*args, func=func):
+                threads.add(threading.get_ident())
+                return func(*args)
+
+            setattr(store, name, traced)
+
+        store.put("alice", 1)
+        store.put("bob", 2)
+        await store.flush()
+        self.assertEqual(await store.get("alice"), 1)
+        self.assertIsNone(await store.get("carol"))
+        await store.close()
+
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_resolve_reads_store_before_whois(self):
+        store = UserStore(self.path)
+        store.put("alice", 1)
+        await store.close()
+
+        bot = IrcClient("TourneyBot", "", reconnect=False, user_store=self.path)
+        self.assertEqual(await bot.resolver.resolve("alice", timeout=1), 1)
+        self.assertEqual(bot.get_user("alice").id, 1)
+        self.assertFalse(bot.resolver.queue)
+        await bot.user_store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()